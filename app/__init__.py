@@ -0,0 +1,3 @@
+"""Draw diagrams from tf state files."""
+
+__version__ = "0.11.0"
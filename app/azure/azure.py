@@ -1,21 +1,36 @@
 """Responsible for drawing azure resources"""
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 import logging
 import datetime
+import re
 
-from diagrams import Diagram, Cluster, Edge, Node
+from diagrams import Cluster, Edge, Node
 from app.common.component import Component
-from app.azure.azure_resource_factory import AzureResourceFactory
-from app.common.resources.draw_custom import DrawCustom
+from app.common.dependencies import dependency_links
+from app.common.inference import LinkInference
+from app.common.links import expand_links
+from app.common.profiler import Profiler
+from app.common.render import LaidOutDiagram, TimedDiagram, choose_strategy
+from app.common.resource import Resource
+from app.azure.azure_resource_factory import AzureResourceFactory, DRAW_CUSTOM
 
 
 def supported_nodes():
     return AzureResourceFactory.get_supported_nodes()
 
 
-def draw(name: str, output_path: str, components: List[Component], links=[]):
-    """Create the azure diagram."""
-    cache = {}
+def projection(type: str):
+    return AzureResourceFactory.get_attributes(type)
+
+
+def draw(name: str, output_path: str, components: List[Component], links=[], profiler: Optional[Profiler] = None,
+         formats: Optional[List[str]] = None, adaptive: bool = False, budget: Optional[float] = None,
+         split: bool = False, workers: Optional[int] = None, inference: Optional[LinkInference] = None,
+         dependencies: bool = False) -> List[str]:
+    """Create the azure diagram, returning the path of each diagram drawn without its extension."""
+    if (profiler == None):
+        profiler = Profiler()
 
     logging.info("drawing...")
     
@@ -33,30 +48,188 @@ def draw(name: str, output_path: str, components: List[Component], links=[]):
             tag_strings.append(f"{key}: {tags[key]} \l") #type: ignore
         tag_string = tag_string + "".join(tag_strings)
             
-    grouped_components = AzureResourceFactory.nest_resources(components)
+    with profiler.phase("nesting"):
+        grouped_components = AzureResourceFactory.nest_resources(components)
+    
+    if (inference != None):
+        with profiler.phase("link_inference"):
+            inferred = inference.infer(grouped_components)
+        profiler.count("inferred_links", len(inferred))
+        links = list(links if links != None else []) + inferred
+    
+    if (dependencies):
+        with profiler.phase("dependency_links"):
+            depends_on = dependency_links(grouped_components)
+        profiler.count("dependency_links", len(depends_on))
+        links = list(links if links != None else []) + depends_on
+    
+    # links can select several components at either end, they are expanded to the keys they match once nested
+    with profiler.phase("link_expansion"):
+        links = expand_links(links, grouped_components)
+    
+    if (output_path == None):
+        # as diagrams names the output when there is no output path
+        output_path = "_".join(name.split()).lower()
+
+    if (split):
+        return __draw_split(name, output_path, grouped_components, links, tag_string, profiler, formats, adaptive, budget, workers)
+    
+    __draw_diagram(name, output_path, grouped_components, links, tag_string, profiler, formats, adaptive, budget)
+    return [output_path]
+
+
+def __draw_diagram(name: str, output_path: str, grouped_components: List[Component], links, tag_string: str, profiler: Profiler,
+                   formats: Optional[List[str]], adaptive: bool, budget: Optional[float], cache: Optional[dict] = None):
+    """Draw nested components as one diagram."""
+    if (cache == None):
+        cache = {}
 
     graph_attr = {
         "splines": "ortho",
-        "layout": "dot"
+        "layout": "dot",
+        # lets links to a cluster end at its border
+        "compound": "true"
     }
-    with Diagram(name, show=False, direction="TB", filename=output_path, graph_attr=graph_attr):
-        __draw(grouped_components, "root", cache)
-        __link(links, cache)
-        if (not tag_string == ""): 
-            attrs = {
-                    "fixedsize": "true",
-                    "labelloc": "t",
-                    "labeljust": "r",
-                    "width":"2.5",
-                    "shape":"plaintext", 
-                    "fontsize": "9",
-                    "margin": "10.0,1.0",
-                }
-            Node(label=tag_string, **attrs)
-
-
-def __draw(components: List[Component], group: str, cache: dict):
-    """Group related azure resources together."""
+    # a single image is laid out and written in one graphviz run, the layout is only kept apart to write
+    # several formats from it or to run it against a budget
+    diagram_type = TimedDiagram
+    options: dict = {"outformat": formats[0] if formats else "png"}
+    if ((formats != None and len(formats) > 1) or adaptive or budget != None):
+        diagram_type = LaidOutDiagram
+        options = {"formats": formats}
+
+    # the layout and image write run when the diagram is closed
+    with diagram_type(name, show=False, direction="TB", filename=output_path, graph_attr=graph_attr, profiler=profiler, **options) as diagram:
+        with profiler.phase("node_construction"):
+            anchors: Dict[str, Node] = {}
+            __draw(grouped_components, "root", cache, anchors)
+            edges = __link(links, cache, anchors)
+            if (not tag_string == ""): 
+                attrs = {
+                        "fixedsize": "true",
+                        "labelloc": "t",
+                        "labeljust": "r",
+                        "width":"2.5",
+                        "shape":"plaintext", 
+                        "fontsize": "9",
+                        "margin": "10.0,1.0",
+                    }
+                Node(label=tag_string, **attrs)
+        
+        clusters = len([x for x in cache.keys() if x.startswith("cluster-")])
+        profiler.count("clusters", clusters)
+        profiler.count("nodes", len(cache) - clusters)
+        profiler.count("edges", edges)
+        
+        # pick cheaper layout settings as the design grows, the budget falls back to them when the layout is too slow
+        if (isinstance(diagram, LaidOutDiagram)):
+            if (adaptive):
+                diagram.strategy = choose_strategy(len(cache) - clusters, edges)
+            diagram.budget = budget
+
+
+def __draw_split(name: str, output_path: str, grouped_components: List[Component], links, tag_string: str, profiler: Profiler,
+                 formats: Optional[List[str]], adaptive: bool, budget: Optional[float], workers: Optional[int]) -> List[str]:
+    """Draw each top level cluster, like a resource group, as its own diagram in a worker process.
+
+    An overview diagram at the output path shows every top level component as a single node
+    with the links between them, links within a cluster are drawn on its own diagram.
+    """
+    # which top level component each key, including cluster keys, belongs to
+    owners = {}
+    for index, component in enumerate(grouped_components):
+        for key in __keys(component):
+            owners.setdefault(key, index)
+
+    group_links = {index: [] for index in range(len(grouped_components))}
+    overview_links = {}
+    for link in (links if links != None else []):
+        if not ("from" in link and "to" in link and link["from"] in owners and link["to"] in owners):
+            logging.warning(f"Ignoring link as object not in any group: {link}")
+            continue
+        
+        source = owners[link["from"]]
+        target = owners[link["to"]]
+        if (source == target):
+            group_links[source].append(link)
+        else:
+            # one edge per pair of groups on the overview, counting the links it stands for
+            overview_links.setdefault((source, target), []).append(link)
+
+    paths = [output_path]
+    used = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for index, component in enumerate(grouped_components):
+            if (not component.is_cluster()):
+                continue
+            
+            slug = re.sub("[^a-z0-9]+", "-", component.name.lower()).strip("-")
+            group_path = f"{output_path}-{slug}"
+            if (group_path in used):
+                group_path = f"{group_path}-{index}"
+            used.add(group_path)
+            paths.append(group_path)
+            
+            futures.append(executor.submit(__draw_group, f"{name} - {component.get_label()}", group_path, component,
+                                           group_links[index], formats, adaptive, budget, Resource.label_width))
+
+        # the overview is drawn here while the groups are drawn by the workers
+        overview = []
+        for component in grouped_components:
+            custom = component.custom
+            if (component.type == DRAW_CUSTOM and custom == None):
+                # custom groups are normally only drawn as a cluster, give them a plain node
+                custom = "diagrams.generic.blank.Blank"
+            overview.append(Component(component.name, component.type, component.mode, component.resource_group,
+                                      component.attributes, [], custom))
+
+        cache = {}
+        overview_profiler = Profiler()
+        edges = []
+        for (source, target), group in overview_links.items():
+            edge = dict(group[0])
+            edge["from"] = grouped_components[source].key
+            edge["to"] = grouped_components[target].key
+            if (len(group) > 1):
+                edge["label"] = f"{len(group)} links"
+            edges.append(edge)
+        __draw_diagram(name, output_path, overview, edges, tag_string, overview_profiler, formats, adaptive, budget, cache)
+        profiler.merge(overview_profiler.report())
+        
+        for future in futures:
+            profiler.merge(future.result())
+
+    profiler.count("diagrams", len(paths))
+    return paths
+
+
+def __draw_group(name: str, output_path: str, component: Component, links, formats: Optional[List[str]],
+                 adaptive: bool, budget: Optional[float], label_width: int) -> dict:
+    """Draw one top level cluster of a split design in a worker process, returning its profile."""
+    # workers may not share the settings of the process that started them
+    Resource.set_label_width(label_width)
+    profiler = Profiler()
+    __draw_diagram(name, output_path, [component], links, "", profiler, formats, adaptive, budget)
+    return profiler.report()
+
+
+def __keys(component: Component):
+    """Get the keys a link can use for a component and everything nested in it."""
+    yield component.key
+    if (component.is_cluster()):
+        yield "cluster-" + component.key
+    for child in component.components:
+        yield from __keys(child)
+
+
+def __draw(components: List[Component], group: str, cache: dict, anchors: Dict[str, Node]) -> Optional[Node]:
+    """Group related azure resources together, returning the first node drawn.
+
+    A link to a cluster is drawn to a node inside it, its own node or else the first one drawn, which is kept
+    in anchors under the cluster key.
+    """
+    first = None
     for component in components:
         bgcolor = "#F8F8F8"
         if (component.mode == "managed"):
@@ -70,32 +243,44 @@ def __draw(components: List[Component], group: str, cache: dict):
         
         if (component.is_cluster()):
             with Cluster(component.get_label().upper(), graph_attr=graph_attrs) as cluster:
-                __draw(component.components, component.key, cache)
+                anchor = __draw(component.components, component.key, cache, anchors)
                 
-                if (not component.type == DrawCustom.identifier()):
-                    __draw_component(component, group, cache)
+                if (not component.type == DRAW_CUSTOM):
+                    node = __draw_component(component, group, cache)
+                    if (node != None):
+                        anchor = node
                     
                 cache['cluster-' + component.key] = cluster
+                if (anchor != None):
+                    anchors['cluster-' + component.key] = anchor
+            node = anchor
         else:
-            __draw_component(component, group, cache)
+            node = __draw_component(component, group, cache)
 
+        if (first == None):
+            first = node
+    return first
 
-def __draw_component(component: Component, group: str, cache: dict):
+
+def __draw_component(component: Component, group: str, cache: dict) -> Optional[Node]:
     node = AzureResourceFactory.get_node(component, group)
     if not node == None:
         cache[component.key] = node
     else:
         logging.warning(
             f"No resource icon for {component.type}: {component.name} is not yet supported")
+    return node
 
 
-def __link(links, cache: dict):
-    """Setup links to all components in diagram."""
+def __link(links, cache: dict, anchors: Dict[str, Node]) -> int:
+    """Setup links to all components in diagram, returning how many were drawn."""
     if (links == None):
-        return
+        return 0
 
     logging.info("linking...")
 
+    edges = 0
+
     for link in links:
         if not ("to" in link and "from" in link):
             logging.error(f"link does not contain and to and from: {link}")
@@ -105,8 +290,19 @@ def __link(links, cache: dict):
                 logging.warning(f"Ignoring link as object not in component cache: {link}")
                 continue
             
+            # a cluster is not a node, the edge is drawn to a node inside it and clipped at its border
+            ends = {}
             component_from = cache[link["from"]]
             component_to = cache[link["to"]]
+            if isinstance(component_from, Cluster):
+                ends["ltail"] = component_from.name
+                component_from = anchors.get(link["from"])
+            if isinstance(component_to, Cluster):
+                ends["lhead"] = component_to.name
+                component_to = anchors.get(link["to"])
+            if (component_from == None or component_to == None):
+                logging.warning(f"Ignoring link as its cluster has nothing drawn in it: {link}")
+                continue
 
             label: str = ""
             if "label" in link:
@@ -122,4 +318,7 @@ def __link(links, cache: dict):
                 color = link["color"]
 
             component_from >> Edge(
-                label=label, style=type, color=color) >> component_to  # type: ignore
+                label=label, style=type, color=color, **ends) >> component_to  # type: ignore
+            edges += 1
+
+    return edges
@@ -1,268 +1,181 @@
 """Factory for doing common tasks around azure diagrams components"""
-from typing import List
+from typing import Dict, FrozenSet, List, Optional, Tuple, Type
+import importlib
 import logging
 
 from app.common.component import Component
-from app.azure.resources.azurerm_key_vault import KeyVault
-from app.azure.resources.azurerm_api_management import ApiManagement
-from app.azure.resources.azurerm_application_insights import AppInsights
-from app.azure.resources.azurerm_subnet import Subnet
-from app.azure.resources.azurerm_resource_group import ResourceGroup
-from app.azure.resources.azurerm_storage_account import Storage
-from app.azure.resources.azurerm_api_management_custom_domain import ApiManagementDomain
-from app.azure.resources.azurerm_app_configuration import AppConfig
-from app.azure.resources.azurerm_api_management_certificate import ApiManagementCertificate
-from app.azure.resources.azurerm_api_management_diagnostic import ApiManagementDiagnostic
-from app.azure.resources.azurerm_api_management_logger import ApiManagementLogger
-from app.azure.resources.azurerm_function_app import FunctionApp
-from app.azure.resources.azurerm_api_management_api import ApiManagementApi
-from app.azure.resources.azurerm_service_plan import ServicePlan
-from app.azure.resources.azurerm_function_app_slot import FunctionAppSlot
-from app.azure.resources.azurerm_servicebus_namespace import ServiceBusNamespace
-from app.azure.resources.azurerm_servicebus_queue import ServiceBusQueue
-from app.azure.resources.azurerm_app_service import AppService
-from app.azure.resources.azurerm_app_service_plan import AppServicePlan
-from app.azure.resources.azurerm_linux_function_app import FunctionAppLinux
-from app.azure.resources.azurerm_signalr_service import Signalr
-from app.azure.resources.azurerm_container_group import ContainerGroup
-from app.azure.resources.azurerm_container_registry import ContainerRegistry
-from app.azure.resources.azurerm_windows_web_app import WindowsWebApp
-from app.azure.resources.azurerm_cosmosdb_account import CosmosAccount
-from app.azure.resources.azurerm_cosmosdb_sql_container import CosmosSqlContainer
-from app.azure.resources.azurerm_cosmosdb_sql_database import CosmosSqlDatabase
-from app.azure.resources.azurerm_windows_web_app_slot import WindowsWebAppSlot
-from app.azure.resources.azurerm_app_service_slot import AppServiceSlot
-from app.azure.resources.azurerm_storage_container import StorageContainer
-from app.azure.resources.azurerm_network_security_group import NetworkSecurityGroup
-from app.azure.resources.azurerm_servicebus_subscription import ServiceBusSubscription
-from app.azure.resources.azurerm_servicebus_topic import ServiceBusTopic
-from app.azure.resources.azurerm_mssql_database import SqlServerDatabase
-from app.azure.resources.azurerm_mssql_server import SqlServer
-from app.azure.resources.azurerm_log_analytics_workspace import LogAnalyticsWorkspace
-from app.azure.resources.azurerm_databricks_workspace import DatabricksWorkspace
-from app.azure.resources.databricks_azure_adls_gen2_mount import DatabricksGen2Mount
-from app.azure.resources.databricks_cluster import DatabricksCluster
-from app.azure.resources.azurerm_kubernetes_cluster import KubernetesCluster
-from app.azure.resources.azurerm_logic_app_workflow import LogicApp
-from app.azure.resources.azurerm_static_site import StaticWebApp
-from app.common.resources.draw_custom import DrawCustom
+from app.common.component_index import ComponentIndex
+from app.common.resource import COMMON_ATTRIBUTES, Resource
+
+
+class ResourceEntry:
+    """A registered resource type, its module is only imported the first time it is used."""
+
+    def __init__(self, module: str, name: str, attrs: Dict[str, str] = {}):
+        """Ctor for resource entry."""
+        self.module = module
+        self.name = name
+        self.attrs = attrs
+        self.__resource: Optional[Type[Resource]] = None
+        self.__attributes: Optional[FrozenSet[str]] = None
+        self.__projected = False
+
+    @property
+    def resource(self) -> Type[Resource]:
+        """Get the resource class, importing it if needed."""
+        if self.__resource == None:
+            self.__resource = getattr(importlib.import_module(self.module), self.name)
+        return self.__resource  # type: ignore
+
+    @property
+    def attributes(self) -> Optional[FrozenSet[str]]:
+        """Get the attributes kept for this type when reading the state, None keeps them all."""
+        if not self.__projected:
+            attributes = self.resource.attributes()
+            if attributes != None:
+                self.__attributes = frozenset(COMMON_ATTRIBUTES + tuple(attributes))  # type: ignore
+            self.__projected = True
+        return self.__attributes
+
+
+NODE_ATTRS = {
+    "fontsize": "8",
+    "fixedsize": "true",
+    "labelloc": "b",
+    "width": "1.2",
+    "height": "1.5",
+    "imagepos": "tc",
+    "imagescale": "true",
+    "margin": "30.0,1.0"
+}
+
+RESOURCES = "app.azure.resources"
+
+REGISTRY: Dict[str, ResourceEntry] = {
+    "azurerm_key_vault": ResourceEntry(f"{RESOURCES}.azurerm_key_vault", "KeyVault"),
+    "azurerm_subnet": ResourceEntry(f"{RESOURCES}.azurerm_subnet", "Subnet", {"height": "1.5"}),
+    "azurerm_api_management": ResourceEntry(f"{RESOURCES}.azurerm_api_management", "ApiManagement", {"height": "1.75"}),
+    "azurerm_api_management_api": ResourceEntry(f"{RESOURCES}.azurerm_api_management_api", "ApiManagementApi", {"height": "1.75"}),
+    "azurerm_api_management_certificate": ResourceEntry(f"{RESOURCES}.azurerm_api_management_certificate", "ApiManagementCertificate", {"height": "1.75"}),
+    "azurerm_api_management_custom_domain": ResourceEntry(f"{RESOURCES}.azurerm_api_management_custom_domain", "ApiManagementDomain", {"height": "1.75"}),
+    "azurerm_api_management_diagnostic": ResourceEntry(f"{RESOURCES}.azurerm_api_management_diagnostic", "ApiManagementDiagnostic"),
+    "azurerm_api_management_logger": ResourceEntry(f"{RESOURCES}.azurerm_api_management_logger", "ApiManagementLogger"),
+    "azurerm_app_configuration": ResourceEntry(f"{RESOURCES}.azurerm_app_configuration", "AppConfig", {"height": "1.75"}),
+    "azurerm_application_insights": ResourceEntry(f"{RESOURCES}.azurerm_application_insights", "AppInsights", {"height": "1.6"}),
+    "azurerm_resource_group": ResourceEntry(f"{RESOURCES}.azurerm_resource_group", "ResourceGroup"),
+    "azurerm_storage_account": ResourceEntry(f"{RESOURCES}.azurerm_storage_account", "Storage", {"height": "1.75"}),
+    "azurerm_storage_container": ResourceEntry(f"{RESOURCES}.azurerm_storage_container", "StorageContainer"),
+    "azurerm_function_app": ResourceEntry(f"{RESOURCES}.azurerm_function_app", "FunctionApp"),
+    "azurerm_function_app_slot": ResourceEntry(f"{RESOURCES}.azurerm_function_app_slot", "FunctionAppSlot"),
+    "azurerm_service_plan": ResourceEntry(f"{RESOURCES}.azurerm_service_plan", "ServicePlan", {"height": "1.75"}),
+    "azurerm_servicebus_namespace": ResourceEntry(f"{RESOURCES}.azurerm_servicebus_namespace", "ServiceBusNamespace", {"height": "1.8"}),
+    "azurerm_servicebus_queue": ResourceEntry(f"{RESOURCES}.azurerm_servicebus_queue", "ServiceBusQueue", {"height": "1.8"}),
+    "azurerm_servicebus_topic": ResourceEntry(f"{RESOURCES}.azurerm_servicebus_topic", "ServiceBusTopic", {"height": "1.8"}),
+    "azurerm_servicebus_subscription": ResourceEntry(f"{RESOURCES}.azurerm_servicebus_subscription", "ServiceBusSubscription", {"height": "1.8"}),
+    "azurerm_app_service_plan": ResourceEntry(f"{RESOURCES}.azurerm_app_service_plan", "AppServicePlan", {"height": "1.75"}),
+    "azurerm_app_service": ResourceEntry(f"{RESOURCES}.azurerm_app_service", "AppService"),
+    "azurerm_linux_function_app": ResourceEntry(f"{RESOURCES}.azurerm_linux_function_app", "FunctionAppLinux"),
+    "azurerm_signalr_service": ResourceEntry(f"{RESOURCES}.azurerm_signalr_service", "Signalr"),
+    "azurerm_container_group": ResourceEntry(f"{RESOURCES}.azurerm_container_group", "ContainerGroup"),
+    "azurerm_container_registry": ResourceEntry(f"{RESOURCES}.azurerm_container_registry", "ContainerRegistry"),
+    "azurerm_windows_web_app": ResourceEntry(f"{RESOURCES}.azurerm_windows_web_app", "WindowsWebApp"),
+    "azurerm_windows_web_app_slot": ResourceEntry(f"{RESOURCES}.azurerm_windows_web_app_slot", "WindowsWebAppSlot"),
+    "azurerm_cosmosdb_account": ResourceEntry(f"{RESOURCES}.azurerm_cosmosdb_account", "CosmosAccount"),
+    "azurerm_cosmosdb_sql_container": ResourceEntry(f"{RESOURCES}.azurerm_cosmosdb_sql_container", "CosmosSqlContainer"),
+    "azurerm_cosmosdb_sql_database": ResourceEntry(f"{RESOURCES}.azurerm_cosmosdb_sql_database", "CosmosSqlDatabase"),
+    "azurerm_app_service_slot": ResourceEntry(f"{RESOURCES}.azurerm_app_service_slot", "AppServiceSlot"),
+    "azurerm_network_security_group": ResourceEntry(f"{RESOURCES}.azurerm_network_security_group", "NetworkSecurityGroup"),
+    "azurerm_mssql_server": ResourceEntry(f"{RESOURCES}.azurerm_mssql_server", "SqlServer", {"height": "1.75"}),
+    "azurerm_mssql_database": ResourceEntry(f"{RESOURCES}.azurerm_mssql_database", "SqlServerDatabase", {"height": "1.75"}),
+    "azurerm_log_analytics_workspace": ResourceEntry(f"{RESOURCES}.azurerm_log_analytics_workspace", "LogAnalyticsWorkspace", {"height": "1.75"}),
+    "azurerm_databricks_workspace": ResourceEntry(f"{RESOURCES}.azurerm_databricks_workspace", "DatabricksWorkspace", {"height": "1.75"}),
+    "databricks_cluster": ResourceEntry(f"{RESOURCES}.databricks_cluster", "DatabricksCluster", {"height": "1.9"}),
+    "databricks_azure_adls_gen2_mount": ResourceEntry(f"{RESOURCES}.databricks_azure_adls_gen2_mount", "DatabricksGen2Mount", {"height": "1.75"}),
+    "azurerm_kubernetes_cluster": ResourceEntry(f"{RESOURCES}.azurerm_kubernetes_cluster", "KubernetesCluster", {"height": "1.8"}),
+    "azurerm_logic_app_workflow": ResourceEntry(f"{RESOURCES}.azurerm_logic_app_workflow", "LogicApp"),
+    "draw_custom": ResourceEntry("app.common.resources.draw_custom", "DrawCustom"),
+    "azurerm_static_site": ResourceEntry(f"{RESOURCES}.azurerm_static_site", "StaticWebApp", {"height": "1.75"})
+}
+
+SUPPORTED_NODES: FrozenSet[str] = frozenset(REGISTRY)
+
+# Groupings run in order, each only when one of the types that feed it is in the design
+GROUPINGS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("azurerm_api_management", ("azurerm_api_management",)),
+    ("azurerm_application_insights", ("azurerm_application_insights",)),
+    ("azurerm_service_plan", ("azurerm_service_plan",)),
+    ("azurerm_app_service_plan", ("azurerm_app_service_plan",)),
+    ("azurerm_servicebus_namespace", ("azurerm_servicebus_namespace", "azurerm_servicebus_queue", "azurerm_servicebus_topic")),
+    ("azurerm_cosmosdb_account", ("azurerm_cosmosdb_account", "azurerm_cosmosdb_sql_database", "azurerm_cosmosdb_sql_container")),
+    ("azurerm_storage_account", ("azurerm_storage_account", "azurerm_storage_container")),
+    ("azurerm_mssql_server", ("azurerm_mssql_server", "azurerm_mssql_database")),
+    ("azurerm_databricks_workspace", ("azurerm_databricks_workspace",))
+]
+
+# Types nested directly under their resource group
+UNGROUPED: List[str] = [
+    "azurerm_key_vault",
+    "azurerm_app_configuration",
+    "azurerm_subnet",
+    "azurerm_signalr_service",
+    "azurerm_container_group",
+    "azurerm_container_registry",
+    "azurerm_network_security_group",
+    "azurerm_log_analytics_workspace",
+    "azurerm_kubernetes_cluster",
+    "azurerm_logic_app_workflow",
+    "azurerm_static_site"
+]
+
+RESOURCE_GROUP = "azurerm_resource_group"
+DRAW_CUSTOM = "draw_custom"
 
 
 class AzureResourceFactory:
     @staticmethod
-    def get_supported_nodes() -> List[str]:
-        return [
-            KeyVault.identifier(),
-            Subnet.identifier(),
-            ApiManagement.identifier(),
-            ApiManagementApi.identifier(),
-            ApiManagementCertificate.identifier(),
-            ApiManagementDomain.identifier(),
-            ApiManagementDiagnostic.identifier(),
-            ApiManagementLogger.identifier(),
-            AppConfig.identifier(),
-            AppInsights.identifier(),
-            ResourceGroup.identifier(),
-            Storage.identifier(),
-            StorageContainer.identifier(),
-            FunctionApp.identifier(),
-            FunctionAppSlot.identifier(),
-            ServicePlan.identifier(),
-            ServiceBusNamespace.identifier(),
-            ServiceBusQueue.identifier(),
-            ServiceBusTopic.identifier(),
-            ServiceBusSubscription.identifier(),
-            AppServicePlan.identifier(),
-            AppService.identifier(),
-            FunctionAppLinux.identifier(),
-            Signalr.identifier(), 
-            ContainerGroup.identifier(), 
-            ContainerRegistry.identifier(),
-            WindowsWebApp.identifier(),
-            WindowsWebAppSlot.identifier(),
-            CosmosAccount.identifier(),
-            CosmosSqlContainer.identifier(),
-            CosmosSqlDatabase.identifier(),
-            AppServiceSlot.identifier(),
-            NetworkSecurityGroup.identifier(),
-            SqlServer.identifier(),
-            SqlServerDatabase.identifier(),
-            LogAnalyticsWorkspace.identifier(),
-            DatabricksWorkspace.identifier(),
-            DatabricksCluster.identifier(),
-            DatabricksGen2Mount.identifier(),
-            KubernetesCluster.identifier(),
-            LogicApp.identifier(),
-            DrawCustom.identifier(),
-            StaticWebApp.identifier()
-        ]
+    def get_supported_nodes() -> FrozenSet[str]:
+        return SUPPORTED_NODES
+
+    @staticmethod
+    def get_attributes(type: str) -> Optional[FrozenSet[str]]:
+        """Get the attributes kept for a type when reading the state, None keeps them all."""
+        entry = REGISTRY.get(type)
+        if entry == None:
+            return None
+        return entry.attributes
 
     @staticmethod
     def get_node(component: Component, group: str):
         """Create the azure diagram."""
-
-        attrs = {
-            "group": group,
-            "fontsize": "8",
-            "fixedsize": "true",
-            "labelloc": "b",
-            "width": "1.2",
-            "height": "1.5",
-            "imagepos": "tc",
-            "imagescale": "true",
-            "margin": "30.0,1.0"
-        }
-
-        if component.type == KeyVault.identifier():
-            return KeyVault.get_node(component, **attrs)
-        elif component.type == ApiManagement.identifier():
-            attrs["height"] = "1.75"
-            return ApiManagement.get_node(component, **attrs)
-        elif component.type == ApiManagementDomain.identifier():
-            attrs["height"] = "1.75"
-            return ApiManagementDomain.get_node(
-                component, **attrs)
-        elif component.type == ApiManagementCertificate.identifier():
-            attrs["height"] = "1.75"
-            return ApiManagementCertificate.get_node(
-                component, **attrs)
-        elif component.type == ApiManagementDiagnostic.identifier():
-            return ApiManagementDiagnostic.get_node(
-                component, **attrs)
-        elif component.type == ApiManagementLogger.identifier():
-            return ApiManagementLogger.get_node(
-                component, **attrs)
-        elif component.type == Storage.identifier():
-            attrs["height"] = "1.75"
-            return Storage.get_node(component, **attrs)
-        elif component.type == StorageContainer.identifier():
-            return StorageContainer.get_node(component, **attrs)
-        elif component.type == AppConfig.identifier():
-            attrs["height"] = "1.75"
-            return AppConfig.get_node(component, **attrs)
-        elif component.type == ResourceGroup.identifier():
-            return ResourceGroup.get_node(component, **attrs)
-        elif component.type == AppInsights.identifier():
-            attrs["height"] = "1.6"
-            return AppInsights.get_node(component, **attrs)
-        elif component.type == Subnet.identifier():
-            attrs["height"] = "1.5"
-            return Subnet.get_node(component, **attrs)
-        elif component.type == FunctionApp.identifier():
-            return FunctionApp.get_node(component, **attrs)
-        elif component.type == FunctionAppLinux.identifier():
-            return FunctionAppLinux.get_node(component, **attrs)
-        elif component.type == FunctionAppSlot.identifier():
-            return FunctionAppSlot.get_node(component, **attrs)
-        elif component.type == ApiManagementApi.identifier():
-            attrs["height"] = "1.75"
-            return ApiManagementApi.get_node(component, **attrs)
-        elif component.type == ServicePlan.identifier():
-            attrs["height"] = "1.75"
-            return ServicePlan.get_node(component, **attrs)
-        elif component.type == ServiceBusNamespace.identifier():
-            attrs["height"] = "1.8"
-            return ServiceBusNamespace.get_node(component, **attrs)
-        elif component.type == ServiceBusQueue.identifier():
-            attrs["height"] = "1.8"
-            return ServiceBusQueue.get_node(component, **attrs)
-        elif component.type == ServiceBusTopic.identifier():
-            attrs["height"] = "1.8"
-            return ServiceBusTopic.get_node(component, **attrs)
-        elif component.type == ServiceBusSubscription.identifier():
-            attrs["height"] = "1.8"
-            return ServiceBusSubscription.get_node(component, **attrs)
-        elif component.type == AppServicePlan.identifier():
-            attrs["height"] = "1.75"
-            return AppServicePlan.get_node(component, **attrs)
-        elif component.type == AppService.identifier():
-            return AppService.get_node(component, **attrs)
-        elif component.type == AppServiceSlot.identifier():
-            return AppServiceSlot.get_node(component, **attrs)
-        elif component.type == Signalr.identifier():
-            return Signalr.get_node(component, **attrs)
-        elif component.type == ContainerGroup.identifier():
-            return ContainerGroup.get_node(component, **attrs)
-        elif component.type == ContainerRegistry.identifier():
-            return ContainerRegistry.get_node(component, **attrs)
-        elif component.type == WindowsWebApp.identifier():
-            return WindowsWebApp.get_node(component, **attrs)
-        elif component.type == WindowsWebAppSlot.identifier():
-            return WindowsWebAppSlot.get_node(component, **attrs)
-        elif component.type == CosmosAccount.identifier():
-            return CosmosAccount.get_node(component, **attrs)
-        elif component.type == CosmosSqlContainer.identifier():
-            return CosmosSqlContainer.get_node(component, **attrs)
-        elif component.type == CosmosSqlDatabase.identifier():
-            return CosmosSqlDatabase.get_node(component, **attrs)
-        elif component.type == NetworkSecurityGroup.identifier():
-            return NetworkSecurityGroup.get_node(component, **attrs)
-        elif component.type == SqlServer.identifier():
-            attrs["height"] = "1.75"
-            return SqlServer.get_node(component, **attrs)
-        elif component.type == SqlServerDatabase.identifier():
-            attrs["height"] = "1.75"
-            return SqlServerDatabase.get_node(component, **attrs)
-        elif component.type == LogAnalyticsWorkspace.identifier():
-            attrs["height"] = "1.75"
-            return LogAnalyticsWorkspace.get_node(component, **attrs)
-        elif component.type == DatabricksWorkspace.identifier():
-            attrs["height"] = "1.75"
-            return DatabricksWorkspace.get_node(component, **attrs)
-        elif component.type == DatabricksGen2Mount.identifier():
-            attrs["height"] = "1.75"
-            return DatabricksGen2Mount.get_node(component, **attrs)
-        elif component.type == DatabricksCluster.identifier():
-            attrs["height"] = "1.9"
-            return DatabricksCluster.get_node(component, **attrs)
-        elif component.type == KubernetesCluster.identifier():
-            attrs["height"] = "1.8"
-            return KubernetesCluster.get_node(component, **attrs)
-        elif component.type == LogicApp.identifier():
-            return LogicApp.get_node(component, **attrs)
-        elif component.type == DrawCustom.identifier():
-            return DrawCustom.get_node(component, **attrs)
-        elif component.type == StaticWebApp.identifier():
-            attrs["height"] = "1.75"
-            return StaticWebApp.get_node(component, **attrs)
-        else:
+        entry = REGISTRY.get(component.type)
+        if entry == None:
             logging.warning(
                 f"No resource icon for {component.type}: {component.name} is not yet supported")
+            return None
+
+        attrs = {"group": group, **NODE_ATTRS, **entry.attrs}
+        return entry.resource.get_node(component, **attrs)
 
     @staticmethod
     def nest_resources(components: List[Component]) -> List[Component]:
         """Group related azure resources together."""
+        index = ComponentIndex(components)
+        resource_group = REGISTRY[RESOURCE_GROUP].resource
 
-        resource_groups = [
-            x for x in components if x.type == ResourceGroup.identifier()]
+        resource_groups = list(index.of_type(RESOURCE_GROUP))
+        resource_group_index = resource_group.index(resource_groups)  # type: ignore
 
-        resources = [
-            ApiManagement.group(components),
-            AppInsights.group(components),
-            ServicePlan.group(components),
-            AppServicePlan.group(components),
-            ServiceBusNamespace.group(components),
-            CosmosAccount.group(components),
-            Storage.group(components),
-            SqlServer.group(components),
-            DatabricksWorkspace.group(components),
-            [x for x in components if x.type == KeyVault.identifier()],
-            [x for x in components if x.type == AppConfig.identifier()],
-            [x for x in components if x.type == Subnet.identifier()],
-            [x for x in components if x.type == Signalr.identifier()],
-            [x for x in components if x.type == ContainerGroup.identifier()],
-            [x for x in components if x.type == ContainerRegistry.identifier()],
-            [x for x in components if x.type == NetworkSecurityGroup.identifier()],
-            [x for x in components if x.type == LogAnalyticsWorkspace.identifier()],
-            [x for x in components if x.type == KubernetesCluster.identifier()],
-            [x for x in components if x.type == LogicApp.identifier()],
-            [x for x in components if x.type == StaticWebApp.identifier()]
-        ]
+        resources = []
+        for identifier, types in GROUPINGS:
+            if any(len(index.of_type(type)) > 0 for type in types):
+                resources.append(REGISTRY[identifier].resource.group(index))  # type: ignore
+        for identifier in UNGROUPED:
+            resources.append(index.of_type(identifier))
 
         for resource_grouping in resources:
-            resource_groups = ResourceGroup.group(
-                resource_groups, resource_grouping)
+            resource_group.group(  # type: ignore
+                resource_groups, resource_group_index, resource_grouping)
 
-        customs = [x for x in components if x.type == DrawCustom.identifier()]
+        customs = index.of_type(DRAW_CUSTOM)
         
         return resource_groups + customs
@@ -1,9 +1,10 @@
 """Azure ApiManagement resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import List
+from typing import List, Tuple
 import logging
 
 
@@ -15,6 +16,11 @@ class ApiManagement(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_api_management"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku_name",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -27,10 +33,9 @@ class ApiManagement(Resource):
         return integration.APIManagement(Resource.get_name(component, metadata), **attrs)
 
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle api management groupings."""
-        apim_resources_all = [
-            x for x in components if x.type.startswith(ApiManagement.identifier())]
+        apim_resources_all = index.of_prefix(ApiManagement.identifier())
         apim_resources_top_level = [
             x for x in apim_resources_all if x.type == ApiManagement.identifier()]
         apim_resources_sub_level = [
@@ -39,12 +44,10 @@ class ApiManagement(Resource):
         for apim_sub in apim_resources_sub_level:
             apim = None
             if "api_management_name" in apim_sub.attributes:
-                apim = next(filter(
-                    lambda x: x.name == apim_sub.attributes["api_management_name"], apim_resources_top_level), None)
+                apim = index.get_by_name(ApiManagement.identifier(), apim_sub.attributes["api_management_name"])
 
             if apim == None and "api_management_id" in apim_sub.attributes:
-                apim = next(filter(
-                    lambda x: x.attributes["id"] == apim_sub.attributes["api_management_id"], apim_resources_top_level), None)
+                apim = index.get_by_id(ApiManagement.identifier(), apim_sub.attributes["api_management_id"])
 
             if apim == None:
                 logging.error(
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import web
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class ApiManagementApi(Resource):
@@ -14,6 +14,11 @@ class ApiManagementApi(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_api_management_api"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("api_management_name", "api_management_id", "display_name", "revision")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import web
+from typing import Tuple
 
 
 class ApiManagementDomain(Resource):
@@ -13,6 +14,11 @@ class ApiManagementDomain(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_api_management_custom_domain"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("api_management_name", "api_management_id", "gateway")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
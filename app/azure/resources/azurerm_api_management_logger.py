@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import devops
+from typing import Tuple
 
 
 class ApiManagementLogger(Resource):
@@ -13,6 +14,11 @@ class ApiManagementLogger(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_api_management_logger"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("api_management_name", "api_management_id")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
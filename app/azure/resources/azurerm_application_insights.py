@@ -1,9 +1,10 @@
 """Azure AppInsights resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import devops
-from typing import List
+from typing import List, Tuple
 import logging
 
 
@@ -15,6 +16,11 @@ class AppInsights(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_application_insights"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("retention_in_days", "source_id")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -27,10 +33,9 @@ class AppInsights(Resource):
         return devops.ApplicationInsights(Resource.get_name(component, metadata), **attrs)
 
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle app insights groupings."""
-        app_insights_resources_all = [
-            x for x in components if x.type.startswith(AppInsights.identifier())]
+        app_insights_resources_all = index.of_prefix(AppInsights.identifier())
         app_insights_resources_top_level = [
             x for x in app_insights_resources_all if x.type == AppInsights.identifier()]
         app_insights_resources_sub_level = [
@@ -39,8 +44,7 @@ class AppInsights(Resource):
         for app_insights_sub in app_insights_resources_sub_level:
             app_insights = None
             if "source_id" in app_insights_sub.attributes:
-                app_insights = next(filter(
-                    lambda x: x.attributes["id"] == app_insights_sub.attributes["source_id"], app_insights_resources_top_level), None)
+                app_insights = index.get_by_id(AppInsights.identifier(), app_insights_sub.attributes["source_id"])
 
             if app_insights == None:
                 logging.error(
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import compute
+from typing import Tuple
 
 
 class ContainerGroup(Resource):
@@ -13,6 +14,11 @@ class ContainerGroup(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_container_group"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("os_type",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import compute
+from typing import Tuple
 
 
 class ContainerRegistry(Resource):
@@ -13,6 +14,11 @@ class ContainerRegistry(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_container_registry"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
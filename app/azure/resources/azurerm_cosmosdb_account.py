@@ -1,9 +1,10 @@
 """Azure CosmosAccount resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import database
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.azurerm_cosmosdb_sql_container import CosmosSqlContainer
 from app.azure.resources.azurerm_cosmosdb_sql_database import CosmosSqlDatabase
@@ -17,10 +18,18 @@ class CosmosAccount(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_cosmosdb_account"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("offer_type",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
-        return f"sku: {component.attributes['offer_type']}"
+        if ("offer_type" in component.attributes):
+            return f"sku: {component.attributes['offer_type']}"
+        else:
+            return ""
 
     @staticmethod
     def get_node(component: Component, **attrs: Dict):
@@ -29,23 +38,20 @@ class CosmosAccount(Resource):
         return database.CosmosDb(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle cosmos account groupings."""
-        cosmos_accounts = [
-            x for x in components if x.type == CosmosAccount.identifier()]
-        cosmos_dbs = CosmosSqlDatabase.group(components)
+        cosmos_dbs = CosmosSqlDatabase.group(index)
 
         for cosmos_db in cosmos_dbs:
             cosmos_db_name = cosmos_db.attributes["account_name"]
             
-            cosmos_account = next(filter(
-                    lambda x: x.attributes["name"] == cosmos_db_name, cosmos_accounts), None)
+            cosmos_account = index.get_by_name(CosmosAccount.identifier(), cosmos_db_name)
 
             if cosmos_account == None:
                 cosmos_account = Component(
                     cosmos_db_name, CosmosAccount.identifier(), "data", cosmos_db.resource_group, {"name": cosmos_db_name, "resource_group_name": cosmos_db.resource_group})
-                cosmos_accounts.append(cosmos_account)
+                index.add(cosmos_account)
 
             cosmos_account.add_component(cosmos_db)
 
-        return cosmos_accounts
+        return index.of_type(CosmosAccount.identifier())
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import database
-from typing import Dict
+from typing import Dict, Tuple
 
 from app.azure.resources.azurerm_servicebus_queue import ServiceBusQueue
 
@@ -16,6 +16,11 @@ class CosmosSqlContainer(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_cosmosdb_sql_container"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("partition_key_path", "database_name", "account_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -1,9 +1,10 @@
 """Azure CosmosSqlDatabase resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import database
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.azurerm_servicebus_queue import ServiceBusQueue
 from app.azure.resources.azurerm_cosmosdb_sql_container import CosmosSqlContainer
@@ -17,10 +18,18 @@ class CosmosSqlDatabase(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_cosmosdb_sql_database"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("throughput", "account_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
-        return f"RU: {component.attributes['throughput']}"
+        if ("throughput" in component.attributes):
+            return f"RU: {component.attributes['throughput']}"
+        else:
+            return ""
 
     @staticmethod
     def get_node(component: Component, **attrs: Dict):
@@ -29,25 +38,21 @@ class CosmosSqlDatabase(Resource):
         return database.SQLDatabases(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle cosmos database groupings."""
-        cosmos_sql_databases = [
-            x for x in components if x.type == CosmosSqlDatabase.identifier()]
-        cosmos_containers = [
-            x for x in components if x.type == CosmosSqlContainer.identifier()]
+        cosmos_containers = index.of_type(CosmosSqlContainer.identifier())
 
         for cosmos_container in cosmos_containers:
             cosmos_database_name = cosmos_container.attributes["database_name"]
             
-            cosmos_database = next(filter(
-                    lambda x: x.attributes["name"] == cosmos_database_name, cosmos_sql_databases), None)
+            cosmos_database = index.get_by_name(CosmosSqlDatabase.identifier(), cosmos_database_name)
 
             if cosmos_database == None:
                 cosmos_database = Component(
                     cosmos_database_name, CosmosSqlDatabase.identifier(), "data", cosmos_container.resource_group, 
                     {"name": cosmos_database_name, "account_name": cosmos_container.attributes["account_name"], "resource_group_name": cosmos_container.resource_group})
-                cosmos_sql_databases.append(cosmos_database)
+                index.add(cosmos_database)
 
             cosmos_database.add_component(cosmos_container)
 
-        return cosmos_sql_databases
+        return index.of_type(CosmosSqlDatabase.identifier())
@@ -1,9 +1,10 @@
 """Azure DatabricksWorkspace resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import analytics
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from app.azure.resources.databricks_cluster import DatabricksCluster
 from app.azure.resources.databricks_azure_adls_gen2_mount import DatabricksGen2Mount
@@ -17,6 +18,11 @@ class DatabricksWorkspace(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_databricks_workspace"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -29,19 +35,16 @@ class DatabricksWorkspace(Resource):
         return analytics.Databricks(Resource.get_name(component, metadata), **attrs)    
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle service bus namespace groupings."""
-        databricks_workspaces = [
-            x for x in components if x.type.startswith(DatabricksWorkspace.identifier())]
+        databricks_workspaces = index.of_prefix(DatabricksWorkspace.identifier())
         
         if (len(databricks_workspaces) <= 0):
             return []
         
         databricks_workspace = databricks_workspaces[0]
-        databricks_clusters = [
-            x for x in components if x.type.startswith(DatabricksCluster.identifier())]
-        databricks_mounts = [
-            x for x in components if x.type.startswith(DatabricksGen2Mount.identifier())]
+        databricks_clusters = index.of_prefix(DatabricksCluster.identifier())
+        databricks_mounts = index.of_prefix(DatabricksGen2Mount.identifier())
         
         for databricks_cluster in databricks_clusters:
             databricks_workspace.add_component(databricks_cluster)
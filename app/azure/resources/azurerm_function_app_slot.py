@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import compute
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class FunctionAppSlot(Resource):
@@ -14,6 +14,11 @@ class FunctionAppSlot(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_function_app_slot"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("function_app_name",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import security
+from typing import Tuple
 
 
 class KeyVault(Resource):
@@ -13,6 +14,11 @@ class KeyVault(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_key_vault"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku_name",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import compute
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class KubernetesCluster(Resource):
@@ -14,6 +14,11 @@ class KubernetesCluster(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_kubernetes_cluster"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("default_node_pool", "sku_tier")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
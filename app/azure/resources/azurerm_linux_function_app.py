@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import compute
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class FunctionAppLinux(Resource):
@@ -14,6 +14,11 @@ class FunctionAppLinux(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_linux_function_app"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("app_service_plan_id", "service_plan_id")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import analytics
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class LogAnalyticsWorkspace(Resource):
@@ -14,6 +14,11 @@ class LogAnalyticsWorkspace(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_log_analytics_workspace"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("retention_in_days", "sku")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
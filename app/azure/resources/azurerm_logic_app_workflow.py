@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class LogicApp(Resource):
@@ -14,6 +14,11 @@ class LogicApp(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_logic_app_workflow"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ()
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
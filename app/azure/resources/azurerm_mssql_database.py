@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import database
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class SqlServerDatabase(Resource):
@@ -14,6 +14,11 @@ class SqlServerDatabase(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_mssql_database"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("max_size_gb", "sku_name", "server_id")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -1,9 +1,10 @@
 """Azure SqlServer resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import database
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from app.azure.resources.azurerm_mssql_database import SqlServerDatabase
 
@@ -16,6 +17,11 @@ class SqlServer(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_mssql_server"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("public_network_access_enabled",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -34,25 +40,21 @@ class SqlServer(Resource):
         return database.SQLServers(Resource.get_name(component, metadata), **attrs)
        
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle service bus namespace groupings."""
-        sql_servers = [
-            x for x in components if x.type.startswith(SqlServer.identifier())]
-        sql_databases = [
-            x for x in components if x.type.startswith(SqlServerDatabase.identifier())]
+        sql_databases = index.of_prefix(SqlServerDatabase.identifier())
         
         for sql_database in sql_databases:
             server_id = sql_database.attributes["server_id"]
             server_name = server_id.split("/")[-1]
                 
-            sql_server = next(filter(
-                    lambda x: x.attributes["id"] == server_id, sql_servers), None)
+            sql_server = index.get_by_id(SqlServer.identifier(), server_id)
 
             if sql_server == None:
                 sql_server = Component(
                     server_name, SqlServer.identifier(), "data", sql_database.resource_group, {"name": server_name, "resource_group_name": sql_database.resource_group})
-                sql_servers.append(sql_server)
+                index.add(sql_server, server_id)
 
             sql_server.add_component(sql_database)
 
-        return sql_servers
+        return index.of_prefix(SqlServer.identifier())
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import network
+from typing import Tuple
 
 
 class NetworkSecurityGroup(Resource):
@@ -13,6 +14,11 @@ class NetworkSecurityGroup(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_network_security_group"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ()
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         return ""
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import general
-from typing import List
+from typing import Dict, List, Tuple
 
 
 class ResourceGroup(Resource):
@@ -14,6 +14,11 @@ class ResourceGroup(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_resource_group"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ()
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -26,19 +31,24 @@ class ResourceGroup(Resource):
         return general.Resourcegroups(Resource.get_name(component, metadata), **attrs)
 
     @staticmethod
-    def group(resource_groups: List[Component], components: List[Component]) -> List[Component]:
-        """Nest inside related resource groups."""
-        resource_groups_copy = resource_groups.copy()
+    def index(resource_groups: List[Component]) -> Dict[str, Component]:
+        """Index resource groups by case-folded name, first one in wins."""
+        resource_group_index: Dict[str, Component] = {}
+        for resource_group in resource_groups:
+            resource_group_index.setdefault(resource_group.name.lower(), resource_group)
+        return resource_group_index
 
+    @staticmethod
+    def group(resource_groups: List[Component], resource_group_index: Dict[str, Component], components: List[Component]):
+        """Nest inside related resource groups, adding implicit groups to both the list and index."""
         for component in components:
-            resource_group = next(filter(
-                lambda x: x.name.lower() == component.resource_group.lower(), resource_groups_copy), None)
+            resource_group_name = component.resource_group.lower()
+            resource_group = resource_group_index.get(resource_group_name)
 
             if resource_group == None:
                 resource_group = Component(
                     component.resource_group, ResourceGroup.identifier(), "data", "Unparented", {})
-                resource_groups_copy.append(resource_group)
+                resource_groups.append(resource_group)
+                resource_group_index[resource_group_name] = resource_group
 
             resource_group.add_component(component)
-
-        return resource_groups_copy
@@ -1,9 +1,10 @@
 """Azure AppServicePlan resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import web
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.common.common_service_plan import CommonServicePlan
 
@@ -16,6 +17,11 @@ class ServicePlan(CommonServicePlan):
         """Get the identifier for this type in TF."""
         return "azurerm_service_plan"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("os_type", "sku_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -31,6 +37,6 @@ class ServicePlan(CommonServicePlan):
         return web.AppServicePlans(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle service plan groupings."""
-        return CommonServicePlan.group(ServicePlan.identifier(), components)
+        return CommonServicePlan.group(ServicePlan.identifier(), index)
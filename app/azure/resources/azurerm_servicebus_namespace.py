@@ -1,9 +1,10 @@
 """Azure ServiceBusNamespace resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.azurerm_servicebus_queue import ServiceBusQueue
 from app.azure.resources.azurerm_servicebus_topic import ServiceBusTopic
@@ -17,6 +18,11 @@ class ServiceBusNamespace(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_servicebus_namespace"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -32,13 +38,10 @@ class ServiceBusNamespace(Resource):
         return integration.ServiceBus(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle service bus namespace groupings."""
-        servicebus_namespaces = [
-            x for x in components if x.type.startswith(ServiceBusNamespace.identifier())]
-        servicebus_topics = ServiceBusTopic.group(components)
-        servicebus_queues = [
-            x for x in components if x.type.startswith(ServiceBusQueue.identifier())]
+        servicebus_topics = ServiceBusTopic.group(index)
+        servicebus_queues = index.of_prefix(ServiceBusQueue.identifier())
         servicebus_queues = servicebus_queues + servicebus_topics
         
         for servicebus_queue in servicebus_queues:
@@ -49,14 +52,13 @@ class ServiceBusNamespace(Resource):
             else:
                 servicebus_namespace_name = servicebus_queue.attributes["namespace_name"]
 
-            servicebus_namespace = next(filter(
-                    lambda x: x.attributes["name"] == servicebus_namespace_name, servicebus_namespaces), None)
+            servicebus_namespace = index.get_by_name(ServiceBusNamespace.identifier(), servicebus_namespace_name)
 
             if servicebus_namespace == None:
                 servicebus_namespace = Component(
                     servicebus_namespace_name, ServiceBusNamespace.identifier(), "data", servicebus_queue.resource_group, {"name": servicebus_namespace_name, "resource_group_name": servicebus_queue.resource_group})
-                servicebus_namespaces.append(servicebus_namespace)
+                index.add(servicebus_namespace)
 
             servicebus_namespace.add_component(servicebus_queue)
 
-        return servicebus_namespaces
+        return index.of_prefix(ServiceBusNamespace.identifier())
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.azurerm_servicebus_subscription import ServiceBusSubscription
 
@@ -16,6 +16,11 @@ class ServiceBusQueue(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_servicebus_queue"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("max_message_size_in_kilobytes", "max_size_in_megabytes", "requires_session", "namespace_id", "namespace_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
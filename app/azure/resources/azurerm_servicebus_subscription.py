@@ -4,7 +4,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class ServiceBusSubscription(Resource):
@@ -15,6 +15,11 @@ class ServiceBusSubscription(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_servicebus_subscription"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("max_delivery_count", "requires_session", "topic_id")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -2,9 +2,10 @@
 """Azure ServiceBusTopic resource."""
 
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import integration
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.azure.resources.azurerm_servicebus_subscription import ServiceBusSubscription
 
@@ -17,6 +18,11 @@ class ServiceBusTopic(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_servicebus_topic"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("max_message_size_in_kilobytes", "max_size_in_megabytes", "namespace_id", "namespace_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -37,12 +43,9 @@ class ServiceBusTopic(Resource):
         return integration.SystemTopic(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle service bus topic groupings."""
-        servicebus_topics = [
-            x for x in components if x.type.startswith(ServiceBusTopic.identifier())]
-        servicebus_subscriptions = [
-            x for x in components if x.type.startswith(ServiceBusSubscription.identifier())]
+        servicebus_subscriptions = index.of_prefix(ServiceBusSubscription.identifier())
 
         for servicebus_queue in servicebus_subscriptions:
             servicebus_topic_id = ""
@@ -51,12 +54,11 @@ class ServiceBusTopic(Resource):
             else:
                 continue
             
-            servicebus_topic = next(filter(
-                    lambda x: x.attributes["id"] == servicebus_topic_id, servicebus_topics), None)
+            servicebus_topic = index.get_by_id(ServiceBusTopic.identifier(), servicebus_topic_id)
 
             if servicebus_topic == None:
                 continue
 
             servicebus_topic.add_component(servicebus_queue)
 
-        return servicebus_topics
+        return index.of_prefix(ServiceBusTopic.identifier())
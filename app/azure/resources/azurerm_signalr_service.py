@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import web
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class Signalr(Resource):
@@ -14,6 +14,11 @@ class Signalr(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_signalr_service"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("sku",)
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import web
+from typing import Tuple
 
 class StaticWebApp(Resource):
     """Base resource component."""
@@ -12,6 +13,11 @@ class StaticWebApp(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_static_site"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("default_host_name", "sku_tier")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -1,7 +1,8 @@
 """Azure Storage resource."""
 
-from typing import List
+from typing import List, Tuple
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import storage
 
@@ -16,9 +17,16 @@ class Storage(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_storage_account"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("access_tier", "account_kind", "account_replication_type", "account_tier")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
+        if (not "access_tier" in component.attributes):
+            return ""
         access_tier = component.attributes['access_tier']
         account_kind = component.attributes['account_kind']
         account_replication_type = component.attributes['account_replication_type']
@@ -33,25 +41,21 @@ class Storage(Resource):
         return storage.StorageAccounts(Resource.get_name(component, metadata), **attrs)
     
     @staticmethod
-    def group(components: List[Component]) -> List[Component]:
+    def group(index: ComponentIndex) -> List[Component]:
         """Handle storage groupings."""
-        storage_accounts = [
-            x for x in components if x.type == Storage.identifier()]
-        storage_containers = [
-            x for x in components if x.type == StorageContainer.identifier()]
+        storage_containers = index.of_type(StorageContainer.identifier())
 
         for storage_container in storage_containers:
             storage_account_name = storage_container.attributes["storage_account_name"]
             
-            storage_account = next(filter(
-                    lambda x: x.attributes["name"] == storage_account_name, storage_accounts), None)
+            storage_account = index.get_by_name(Storage.identifier(), storage_account_name)
 
             if storage_account == None:
                 storage_account = Component(
                     storage_account_name, Storage.identifier(), "data", storage_container.resource_group, 
                     {"name": storage_account_name, "resource_group_name": storage_container.resource_group})
-                storage_accounts.append(storage_account)
+                index.add(storage_account)
 
             storage_account.add_component(storage_container)
 
-        return storage_accounts
+        return index.of_type(Storage.identifier())
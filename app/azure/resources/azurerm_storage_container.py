@@ -3,6 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import storage
+from typing import Tuple
 
 
 class StorageContainer(Resource):
@@ -13,6 +14,11 @@ class StorageContainer(Resource):
         """Get the identifier for this type in TF."""
         return "azurerm_storage_container"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("container_access_type", "storage_account_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         return f"Access: {component.attributes['container_access_type']}"
@@ -2,6 +2,7 @@
 
 from abc import abstractmethod
 from app.common.component import Component
+from app.common.component_index import ComponentIndex
 from app.common.resource import Resource
 from diagrams.azure import web
 from typing import List, Dict
@@ -38,14 +39,11 @@ class CommonServicePlan(Resource):
         pass
     
     @staticmethod
-    def group(identifier, components: List[Component]) -> List[Component]:
+    def group(identifier, index: ComponentIndex) -> List[Component]:
         """Handle service plan groupings."""
-        function_apps = CommonServicePlan.__group_function_apps(components)
-        windows_web_apps = CommonServicePlan.__group_web_apps(components)
-        app_services = CommonServicePlan.__group_app_services(components)
-        
-        service_plans = [
-            x for x in components if x.type.startswith(identifier)]
+        function_apps = CommonServicePlan.__group_function_apps(index)
+        windows_web_apps = CommonServicePlan.__group_web_apps(index)
+        app_services = CommonServicePlan.__group_app_services(index)
 
         for function_app in function_apps:
             service_plan_id = ""
@@ -56,8 +54,7 @@ class CommonServicePlan(Resource):
                 
             app_service_plan_name = service_plan_id.split("/")[-1]
             
-            app_service_plan = next(filter(
-                    lambda x: x.attributes["name"] == app_service_plan_name, service_plans), None)
+            app_service_plan = index.get_by_name(identifier, app_service_plan_name)
 
             if app_service_plan == None:
                 logging.info(f"No {identifier} found for {function_app.key}")
@@ -74,8 +71,7 @@ class CommonServicePlan(Resource):
                 
             app_service_plan_name = service_plan_id.split("/")[-1]
             
-            app_service_plan = next(filter(
-                    lambda x: x.attributes["name"] == app_service_plan_name, service_plans), None)
+            app_service_plan = index.get_by_name(identifier, app_service_plan_name)
 
             if app_service_plan == None:
                 logging.info(f"No {identifier} found for {windows_web_app.key}")
@@ -92,8 +88,7 @@ class CommonServicePlan(Resource):
                 
             app_service_plan_name = service_plan_id.split("/")[-1]
             
-            app_service_plan = next(filter(
-                    lambda x: x.attributes["name"] == app_service_plan_name, service_plans), None)
+            app_service_plan = index.get_by_name(identifier, app_service_plan_name)
 
             if app_service_plan == None:
                 logging.info(f"No {identifier} found for {app_service.key}")
@@ -101,24 +96,19 @@ class CommonServicePlan(Resource):
 
             app_service_plan.add_component(app_service)
 
-        return service_plans
+        return index.of_prefix(identifier)
     
     
     @staticmethod
-    def __group_web_apps(components: List[Component]) -> List[Component]:
+    def __group_web_apps(index: ComponentIndex) -> List[Component]:
         """Handle web app groupings."""
-        windows_web_apps_all = [
-            x for x in components if x.type.startswith(WindowsWebApp.identifier())]
-        windows_web_apps = [
-            x for x in windows_web_apps_all if x.type == WindowsWebApp.identifier()]
-        windows_web_app_slots = [
-            x for x in windows_web_apps_all if x.type == WindowsWebAppSlot.identifier()]
+        windows_web_apps = index.of_type(WindowsWebApp.identifier())
+        windows_web_app_slots = index.of_type(WindowsWebAppSlot.identifier())
 
         for windows_web_app_slot in windows_web_app_slots:
             windows_web_app = None
             if "app_service_id" in windows_web_app_slot.attributes:
-                windows_web_app = next(filter(
-                    lambda x: x.attributes["id"] == windows_web_app_slot.attributes["app_service_id"], windows_web_apps), None)
+                windows_web_app = index.get_by_id(WindowsWebApp.identifier(), windows_web_app_slot.attributes["app_service_id"])
 
             if windows_web_app == None:
                 logging.info(
@@ -137,20 +127,15 @@ class CommonServicePlan(Resource):
         return windows_web_apps
     
     @staticmethod
-    def __group_function_apps(components: List[Component]) -> List[Component]:
+    def __group_function_apps(index: ComponentIndex) -> List[Component]:
         """Handle function app groupings."""
-        function_apps_all = [
-            x for x in components if x.type.startswith(FunctionApp.identifier())]
-        function_apps = [
-            x for x in function_apps_all if x.type == FunctionApp.identifier()]
-        function_app_slots = [
-            x for x in function_apps_all if x.type == FunctionAppSlot.identifier()]
+        function_apps = list(index.of_type(FunctionApp.identifier()))
+        function_app_slots = index.of_type(FunctionAppSlot.identifier())
 
         for function_app_slot in function_app_slots:
             function_app = None
             if "function_app_name" in function_app_slot.attributes:
-                function_app = next(filter(
-                    lambda x: x.attributes["name"] == function_app_slot.attributes["function_app_name"], function_apps), None)
+                function_app = index.get_by_name(FunctionApp.identifier(), function_app_slot.attributes["function_app_name"])
 
             if function_app == None:
                 logging.info(
@@ -168,8 +153,7 @@ class CommonServicePlan(Resource):
             
         # handle linux ones too
         
-        function_apps_linux = [
-            x for x in components if x.type == FunctionAppLinux.identifier()]
+        function_apps_linux = index.of_type(FunctionAppLinux.identifier())
 
         for function_app_linux in function_apps_linux:
             function_apps.append(function_app_linux)
@@ -177,20 +161,15 @@ class CommonServicePlan(Resource):
         return function_apps   
      
     @staticmethod
-    def __group_app_services(components: List[Component]) -> List[Component]:
+    def __group_app_services(index: ComponentIndex) -> List[Component]:
         """Handle web app groupings."""
-        app_services_all = [
-            x for x in components if x.type.startswith(AppService.identifier())]
-        app_services = [
-            x for x in app_services_all if x.type == AppService.identifier()]
-        app_service_slots = [
-            x for x in app_services_all if x.type == AppServiceSlot.identifier()]
+        app_services = index.of_type(AppService.identifier())
+        app_service_slots = index.of_type(AppServiceSlot.identifier())
 
         for app_service_slot in app_service_slots:
             app_service = None
             if "app_service_id" in app_service_slot.attributes:
-                app_service = next(filter(
-                    lambda x: x.attributes["id"] == app_service_slot.attributes["app_service_id"], app_services), None)
+                app_service = index.get_by_id(AppService.identifier(), app_service_slot.attributes["app_service_id"])
 
             if app_service == None:
                 logging.info(
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import analytics
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class DatabricksGen2Mount(Resource):
@@ -14,6 +14,11 @@ class DatabricksGen2Mount(Resource):
         """Get the identifier for this type in TF."""
         return "databricks_azure_adls_gen2_mount"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("container_name", "storage_account_name")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -3,7 +3,7 @@
 from app.common.component import Component
 from app.common.resource import Resource
 from diagrams.azure import analytics
-from typing import Dict
+from typing import Dict, Tuple
 
 
 class DatabricksCluster(Resource):
@@ -14,6 +14,11 @@ class DatabricksCluster(Resource):
         """Get the identifier for this type in TF."""
         return "databricks_cluster"
 
+    @staticmethod
+    def attributes() -> Tuple[str, ...]:
+        """Get the attributes of this type read when drawing it."""
+        return ("cluster_id", "driver_node_type_id", "node_type_id", "num_workers", "spark_version")
+
     @staticmethod
     def get_metadata(component: Component) -> str:
         """Get the metadata string from this components attributes."""
@@ -0,0 +1,59 @@
+"""Draw many designs at once in a pool of worker processes."""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple
+import glob
+import os
+import time
+import traceback
+
+from app.common.drawing import commonDraw
+from app.common.profiler import PROFILE_SUFFIX
+
+
+class BatchResult(NamedTuple):
+    """Outcome of drawing a single config."""
+    path: str
+    ok: bool
+    seconds: float
+    error: str = ""
+
+
+def find_configs(configs: str) -> List[str]:
+    """Expand a directory or glob into the config files to draw."""
+    pattern = configs
+    if os.path.isdir(configs):
+        pattern = os.path.join(configs, "**", "*.json")
+
+    paths = glob.glob(pattern, recursive=True)
+    return sorted(x for x in paths if os.path.isfile(x) and x.find('~') == -1 and not x.endswith(PROFILE_SUFFIX))
+
+
+def draw_all(paths: List[str], workers: int, verbose: bool, use_cache: bool = True) -> List[BatchResult]:
+    """Draw each config in its own worker, one failure does not stop the others."""
+    results: List[BatchResult] = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(__draw_one, path, verbose, use_cache): path for path in paths}
+
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # the worker itself died, e.g. killed or out of memory
+                results.append(BatchResult(futures[future], False, 0.0, repr(e)))
+
+    results.sort(key=lambda x: x.path)
+    return results
+
+
+def __draw_one(path: str, verbose: bool, use_cache: bool) -> BatchResult:
+    """Draw a single config inside a worker process."""
+    start = time.perf_counter()
+    try:
+        code = commonDraw(None, None, None, None, path, verbose, use_cache)
+        error = "" if code == 0 else f"exited with {code}"
+        return BatchResult(path, code == 0, time.perf_counter() - start, error)
+    except Exception as e:
+        if verbose:
+            traceback.print_exc()
+        return BatchResult(path, False, time.perf_counter() - start, f"{type(e).__name__}: {e}")
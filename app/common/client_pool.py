@@ -0,0 +1,127 @@
+"""Process wide pool of azure clients used to read remote state."""
+from typing import Any, Dict, Optional, Tuple
+import os
+import threading
+import time
+
+KEY_TTL_ENV = "DRAWTF_KEY_TTL"
+KEY_TTL = 15 * 60
+
+# size of the first request and of each ranged chunk after it when downloading blobs
+SINGLE_GET_SIZE = 4 * 1024 * 1024
+CHUNK_GET_SIZE = 4 * 1024 * 1024
+
+
+class ClientPool:
+    """Reuse credentials, account connection strings and blob clients across draws.
+
+    Connection strings built from account keys expire after a ttl so rotated keys are picked up,
+    blob service clients are kept per connection string so their http sessions are reused. The pool
+    lock only guards the caches, the keys of each account are fetched under a lock of their own so
+    fetches for different accounts run at once and concurrent fetches for one account share a call.
+    """
+
+    def __init__(self, key_ttl: Optional[float] = None):
+        """Ctor for client pool."""
+        if key_ttl == None:
+            key_ttl = float(os.environ.get(KEY_TTL_ENV, KEY_TTL))
+        self.__key_ttl = key_ttl
+        self.__lock = threading.RLock()
+        self.__credential = None
+        self.__storage_clients: Dict[str, Any] = {}
+        self.__connections: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+        self.__account_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self.__service_clients: Dict[str, Any] = {}
+
+    def get_connection(self, storage_config: dict) -> str:
+        """Get the connection string for the storage account, fetching the account keys if needed."""
+        if 'connection-string' in storage_config:
+            return storage_config['connection-string']
+
+        key = ClientPool.__account_key(storage_config)
+        connection = self.__cached_connection(key)
+        if connection != None:
+            return connection  # type: ignore
+
+        with self.__lock:
+            account_lock = self.__account_locks.setdefault(key, threading.Lock())
+
+        with account_lock:
+            # another draw may have fetched the keys while this one waited
+            connection = self.__cached_connection(key)
+            if connection != None:
+                return connection  # type: ignore
+
+            # the credential and list_keys both go over the network, only this account waits on them
+            storage_client = self.__get_storage_client(storage_config['subscription-id'])
+            storage_keys = storage_client.storage_accounts.list_keys(storage_config['resource-group'], storage_config['account'])
+            storage_keys = {v.key_name: v.value for v in storage_keys.keys}  # type: ignore
+            connection = f"DefaultEndpointsProtocol=https;AccountName={storage_config['account']};AccountKey={storage_keys['key1']};EndpointSuffix=core.windows.net"
+            with self.__lock:
+                self.__connections[key] = (connection, time.time() + self.__key_ttl)
+            return connection
+
+    def get_blob_client(self, storage_config: dict, blob: str):
+        """Get a client for a blob from a pooled blob service client."""
+        from azure.storage.blob import BlobServiceClient
+
+        connection = self.get_connection(storage_config)
+        with self.__lock:
+            if connection not in self.__service_clients:
+                self.__service_clients[connection] = BlobServiceClient.from_connection_string(
+                    connection, max_single_get_size=SINGLE_GET_SIZE, max_chunk_get_size=CHUNK_GET_SIZE)
+            blob_service_client = self.__service_clients[connection]
+
+        return blob_service_client.get_blob_client(storage_config['container'], blob)
+
+    def invalidate(self, storage_config: dict):
+        """Forget the connection for an account, e.g. after its keys were rotated."""
+        if 'connection-string' in storage_config:
+            return
+
+        with self.__lock:
+            entry = self.__connections.pop(ClientPool.__account_key(storage_config), None)
+            if entry != None:
+                self.__service_clients.pop(entry[0], None)
+
+    def export(self) -> Dict[Tuple[str, str, str], Tuple[str, float]]:
+        """Get the unexpired connections, to hand to a child process."""
+        with self.__lock:
+            now = time.time()
+            return {k: v for k, v in self.__connections.items() if now < v[1]}
+
+    def restore(self, connections: Dict[Tuple[str, str, str], Tuple[str, float]]):
+        """Add connections exported from another process."""
+        with self.__lock:
+            self.__connections.update(connections)
+
+    def __cached_connection(self, key: Tuple[str, str, str]) -> Optional[str]:
+        """Get the connection for an account if it has not expired."""
+        with self.__lock:
+            if key in self.__connections:
+                connection, expires = self.__connections[key]
+                if time.time() < expires:
+                    return connection
+        return None
+
+    def __get_storage_client(self, subscription_id: str):
+        """Get the management client for a subscription, sharing one credential."""
+        # the azure sdk is slow to import, only load it when remote state is used
+        from azure.identity import DefaultAzureCredential
+        from azure.mgmt.storage import StorageManagementClient
+
+        # creating them makes no requests, tokens are acquired when the client is first used
+        with self.__lock:
+            if self.__credential == None:
+                self.__credential = DefaultAzureCredential()
+            if subscription_id not in self.__storage_clients:
+                self.__storage_clients[subscription_id] = StorageManagementClient(self.__credential, subscription_id)
+            return self.__storage_clients[subscription_id]
+
+    @staticmethod
+    def __account_key(storage_config: dict) -> Tuple[str, str, str]:
+        """Get the pool key for a storage account."""
+        return (storage_config['subscription-id'], storage_config['resource-group'], storage_config['account'])
+
+
+POOL = ClientPool()
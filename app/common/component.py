@@ -1,22 +1,40 @@
 """Component class which builds up a tree of objects."""
 
-from typing import List
+from typing import Iterable, List, Optional, Sequence
+import sys
 
 
 class Component:
-    """Component class which builds up a tree of objects."""
+    """Component class which builds up a tree of objects.
 
-    def __init__(self, name: str, type: str, mode: str, resource_group: str, attributes: dict, components = [], custom = None):
+    Large states create a component per instance, so components have no instance dict, the
+    repeated type, mode and resource group strings are interned and the list of children is
+    only allocated when the first child is added.
+    """
+
+    __slots__ = ("name", "type", "key", "mode", "resource_group", "attributes", "custom", "address", "module", "dependencies", "__components")
+
+    def __init__(self, name: str, type: str, mode: str, resource_group: str, attributes: dict,
+                 components: Optional[Iterable["Component"]] = None, custom = None):
         """Ctor for component."""
         self.name = name
-        self.type = type
+        self.type = sys.intern(type)
         self.key = f"{name}-{type}"
-        self.mode = mode
-        self.resource_group = resource_group
+        self.mode = sys.intern(mode) if isinstance(mode, str) else mode
+        self.resource_group = sys.intern(resource_group) if isinstance(resource_group, str) else resource_group
         self.attributes = attributes
-        self.components: List[Component] = components.copy()
         self.custom = custom
-        
+        # terraform address of the resource and those it depends on, only read from the state when drawing dependencies
+        self.address: Optional[str] = None
+        # module of the resource with its instance keys, e.g. module.app["a"], None at the root module
+        self.module: Optional[str] = None
+        self.dependencies: Optional[List[str]] = None
+        self.__components: Optional[List[Component]] = list(components) if components else None
+
+    @property
+    def components(self) -> Sequence["Component"]:
+        """Get the child components, an empty tuple when there are none."""
+        return self.__components if self.__components is not None else ()
 
     def get_label(self):
         """Get Components from structure."""
@@ -28,11 +46,14 @@ class Component:
     def get_components(self):
         """Get Components from structure."""
         return self.components
-    
+
     def add_component(self, component):
         """Add a Component to the tree structure."""
-        self.components.append(component)
+        if self.__components is None:
+            self.__components = [component]
+        else:
+            self.__components.append(component)
 
     def is_cluster(self) -> bool:
         """Check if this is a cluster type."""
-        return len(self.components) > 0
+        return self.__components is not None
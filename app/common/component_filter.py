@@ -0,0 +1,179 @@
+"""Filters deciding which resources are read from the state, compiled once before it is read."""
+
+from fnmatch import translate
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+import re
+
+from app.common.component import Component
+
+REGEX_PREFIX = "re:"
+GLOB_CHARS = "*?["
+
+# config keys for each filter, the CLI options of the same name add to them
+CONFIG_KEYS = {
+    "include_keys": "includes",
+    "exclude_keys": "excludes",
+    "include_types": "includeTypes",
+    "exclude_types": "excludeTypes",
+    "include_resource_groups": "includeResourceGroups",
+    "exclude_resource_groups": "excludeResourceGroups",
+    "include_tags": "includeTags",
+    "exclude_tags": "excludeTags",
+}
+
+
+class Matcher:
+    """Match values against exact strings, globs and regexes.
+
+    Exact strings are kept in a set and the globs and regexes compiled into a single pattern, so matching
+    costs a lookup and at most one regex whatever the number of patterns. Patterns starting with "re:" are
+    regexes, those containing any of *?[ are globs and still match their own text, as keys such as
+    "App [legacy]-draw_custom" hold these characters.
+    """
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool = False):
+        """Ctor for matcher."""
+        self.ignore_case = ignore_case
+        exact = set()
+        expressions = []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                expressions.append(pattern[len(REGEX_PREFIX):])
+            else:
+                if any(x in pattern for x in GLOB_CHARS):
+                    expressions.append(translate(pattern))
+                exact.add(pattern.lower() if ignore_case else pattern)
+
+        self.exact: FrozenSet[str] = frozenset(exact)
+        self.pattern: Optional[Pattern] = None
+        if len(expressions) > 0:
+            self.pattern = re.compile("|".join(f"(?:{x})" for x in expressions), re.IGNORECASE if ignore_case else 0)
+
+    def __bool__(self) -> bool:
+        return len(self.exact) > 0 or self.pattern != None
+
+    def matches(self, value: Any) -> bool:
+        """Check if a value matches any of the patterns."""
+        if not isinstance(value, str):
+            return False
+        if (self.ignore_case and value.lower() in self.exact) or (not self.ignore_case and value in self.exact):
+            return True
+        return self.pattern != None and self.pattern.fullmatch(value) != None  # type: ignore
+
+
+class TagMatcher:
+    """Match tags against "Name=Value" patterns, the value being a pattern as for Matcher, or "Name" for any value."""
+
+    def __init__(self, patterns: Iterable[str]):
+        """Ctor for tag matcher."""
+        values: Dict[str, List[str]] = {}
+        self.any_value: FrozenSet[str] = frozenset(x for x in patterns if not "=" in x)
+        for pattern in patterns:
+            if "=" in pattern:
+                tag, value = pattern.split("=", 1)
+                values.setdefault(tag, []).append(value)
+        self.values: Dict[str, Matcher] = {k: Matcher(v) for k, v in values.items()}
+
+    def __bool__(self) -> bool:
+        return len(self.any_value) > 0 or len(self.values) > 0
+
+    def matches(self, tags: Optional[Dict[str, Any]]) -> bool:
+        """Check if any of the tags matches any of the patterns."""
+        if not tags:
+            return False
+        for tag, value in tags.items():
+            if tag in self.any_value:
+                return True
+            matcher = self.values.get(tag)
+            if matcher != None and matcher.matches(value):  # type: ignore
+                return True
+        return False
+
+
+class TypeFilter:
+    """Include and exclude resource types, each type is only matched once."""
+
+    def __init__(self, include_types: Iterable[str] = (), exclude_types: Iterable[str] = ()):
+        """Ctor for type filter."""
+        self.include_types = Matcher(include_types)
+        self.exclude_types = Matcher(exclude_types)
+        self.__types: Dict[str, bool] = {}
+
+    def allows(self, type: str) -> bool:
+        """Check if a type is kept."""
+        allowed = self.__types.get(type)
+        if allowed == None:
+            allowed = (not self.include_types or self.include_types.matches(type)) and not self.exclude_types.matches(type)
+            self.__types[type] = allowed
+        return allowed  # type: ignore
+
+
+class ComponentFilter:
+    """Include and exclude resources by key, type, resource group and tags.
+
+    A resource is kept when it matches every include given, of any kind, and none of the excludes. Types
+    are checked once per resource block so a block of a filtered type is skipped without reading its
+    instances. Resource group names match without case, as in azure, and a resource group matches on its
+    own name.
+    """
+
+    def __init__(self, include_keys: Iterable[str] = (), exclude_keys: Iterable[str] = (),
+                 include_types: Iterable[str] = (), exclude_types: Iterable[str] = (),
+                 include_resource_groups: Iterable[str] = (), exclude_resource_groups: Iterable[str] = (),
+                 include_tags: Iterable[str] = (), exclude_tags: Iterable[str] = ()):
+        """Ctor for component filter."""
+        self.include_keys = Matcher(include_keys)
+        self.exclude_keys = Matcher(exclude_keys)
+        self.types = TypeFilter(include_types, exclude_types)
+        self.include_resource_groups = Matcher(include_resource_groups, True)
+        self.exclude_resource_groups = Matcher(exclude_resource_groups, True)
+        self.include_tags = TagMatcher(include_tags)
+        self.exclude_tags = TagMatcher(exclude_tags)
+
+        # with only type filters there is nothing to check per instance
+        self.by_instance = any([self.include_keys, self.exclude_keys, self.include_resource_groups,
+                                self.exclude_resource_groups, self.include_tags, self.exclude_tags])
+
+    @staticmethod
+    def from_config(config_data: Dict, **cli: Iterable[str]) -> "ComponentFilter":
+        """Create the filter from the config, adding the patterns given on the CLI."""
+        patterns = {}
+        for argument, key in CONFIG_KEYS.items():
+            patterns[argument] = list(config_data.get(key, [])) + list(cli.get(argument) or [])
+        return ComponentFilter(**patterns)
+
+    def allows_type(self, type: str) -> bool:
+        """Check if resources of a type can be kept."""
+        return self.types.allows(type)
+
+    def allows(self, name: str, type: str, resource_group: str, tags: Optional[Dict[str, Any]]) -> bool:
+        """Check if a resource is kept."""
+        if not self.allows_type(type):
+            return False
+        if not self.by_instance:
+            return True
+
+        key = f"{name}-{type}"
+        if (self.include_keys and not self.include_keys.matches(key)) or self.exclude_keys.matches(key):
+            return False
+
+        resource_groups = resource_group_names(name, type, resource_group)
+        if (self.include_resource_groups and not any(self.include_resource_groups.matches(x) for x in resource_groups)):
+            return False
+        if any(self.exclude_resource_groups.matches(x) for x in resource_groups):
+            return False
+
+        if (self.include_tags and not self.include_tags.matches(tags)) or self.exclude_tags.matches(tags):
+            return False
+        return True
+
+    def allows_component(self, component: Component) -> bool:
+        """Check if a component is kept."""
+        return self.allows(component.name, component.type, component.resource_group, component.attributes.get("tags"))
+
+
+def resource_group_names(name: str, type: str, resource_group: str) -> Tuple[str, ...]:
+    """Get the resource group names a resource matches on, a resource group matches on its own name."""
+    if type.endswith("_resource_group"):
+        return (resource_group, name)
+    return (resource_group,)
@@ -0,0 +1,87 @@
+"""Hash indexes over components used when nesting resources and walking the nested components."""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.common.component import Component
+
+
+class ComponentIndex:
+    """Index components by type, id and name so parents resolve with a single lookup."""
+
+    def __init__(self, components: List[Component]):
+        """Ctor for component index."""
+        self.__by_type: Dict[str, List[Component]] = {}
+        self.__by_id: Dict[Tuple[str, str], Component] = {}
+        self.__by_name: Dict[Tuple[str, str], Component] = {}
+        self.__order: Dict[int, int] = {}
+
+        for component in components:
+            self.add(component)
+
+    def add(self, component: Component, component_id: Optional[str] = None):
+        """Add a component, first one in wins for duplicate ids and names of the same type."""
+        self.__by_type.setdefault(component.type, []).append(component)
+        self.__order[id(component)] = len(self.__order)
+
+        if component_id == None:
+            component_id = component.attributes.get("id")
+        if component_id != None:
+            self.__by_id.setdefault((component.type, component_id), component)
+
+        self.__by_name.setdefault((component.type, component.name), component)
+
+    def of_type(self, type: str) -> List[Component]:
+        """Get the components of exactly this type, in the order they were added."""
+        return self.__by_type.get(type, [])
+
+    def of_prefix(self, prefix: str) -> List[Component]:
+        """Get the components whose type starts with the prefix."""
+        matches = [typed for type, typed in self.__by_type.items() if type.startswith(prefix)]
+        if len(matches) == 1:
+            return list(matches[0])
+
+        # keep the original ordering across types
+        components = [component for typed in matches for component in typed]
+        components.sort(key=lambda x: self.__order[id(x)])
+        return components
+
+    def get_by_id(self, type: str, component_id: str) -> Optional[Component]:
+        """Get the component of a type with the given id."""
+        return self.__by_id.get((type, component_id))
+
+    def get_by_name(self, type: str, name: str) -> Optional[Component]:
+        """Get the component of a type with the given name."""
+        return self.__by_name.get((type, name))
+
+
+class ComponentTree:
+    """Index the component each nested component is in, by identity as keys are not unique, e.g. queues of the
+    same name in two namespaces."""
+
+    def __init__(self, components: List[Component]):
+        """Ctor for component tree."""
+        self.components: List[Component] = []
+        self.__parents: Dict[int, Optional[Component]] = {}
+        for component, parent in self.__walk(components, None):
+            self.components.append(component)
+            self.__parents[id(component)] = parent
+
+    def nested(self, component: Component, ancestor: Component) -> bool:
+        """Check if a component is nested in another."""
+        parent = self.__parents.get(id(component))
+        while parent != None:
+            if parent is ancestor:
+                return True
+            parent = self.__parents.get(id(parent))
+        return False
+
+    def related(self, component: Component, other: Component) -> bool:
+        """Check if either component is nested in the other, so a link between them is shown by the nesting."""
+        return self.nested(component, other) or self.nested(other, component)
+
+    @staticmethod
+    def __walk(components: List[Component], parent: Optional[Component]) -> Iterator[Tuple[Component, Optional[Component]]]:
+        """Get every component with the component it is nested in."""
+        for component in components:
+            yield component, parent
+            yield from ComponentTree.__walk(component.components, component)
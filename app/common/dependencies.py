@@ -0,0 +1,122 @@
+"""Links between components from the dependencies terraform records for each resource."""
+
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import re
+
+from app.common.component import Component
+from app.common.component_index import ComponentTree
+
+LINK_STYLE = {"type": "solid", "color": "gray60"}
+
+# a module call with its instance key, if any, e.g. module.app["a"]
+MODULE_CALL = re.compile(r'module\.([^.\[]+)(\[[^\]]*\])?')
+
+
+def dependency_links(components: List[Component]) -> List[dict]:
+    """Get a link from each component to each component it depends on, reduced to the fewest links that
+    keep every dependency, e.g. no link from an app to its resource group when it already depends on its
+    plan which depends on the resource group.
+
+    Resources are linked by their terraform address, which terraform records without module instance keys.
+    An instance of a module created with count or for_each, such as module.app["a"], links to the resources
+    it depends on in the same module instance, and to every instance of them only when none is in it.
+    Dependencies on resources that are not drawn are dropped, as are those shown by one component being
+    nested in the other.
+    """
+    by_address: Dict[str, List[Component]] = {}
+    tree = ComponentTree(components)
+    for component in tree.components:
+        if component.address != None:
+            by_address.setdefault(component.address, []).append(component)  # type: ignore
+
+    # the graph is between resources, not instances, terraform only records dependencies on resources
+    graph: Dict[str, Set[str]] = {}
+    for address, instances in by_address.items():
+        depends_on = graph.setdefault(address, set())
+        for instance in instances:
+            for dependency in instance.dependencies or []:
+                if dependency != address and dependency in by_address:
+                    depends_on.add(dependency)
+
+    reduced = transitive_reduction(graph)
+
+    links = []
+    seen = set()
+    calls: Dict[Optional[str], Tuple[Tuple[str, str], ...]] = {}
+    for address, depends_on in reduced.items():
+        for dependency in depends_on:
+            for source in by_address[address]:
+                targets = by_address[dependency]
+                if len(targets) > 1:
+                    targets = [x for x in targets if __same_instance(calls, source, x)] or targets
+                for target in targets:
+                    if tree.related(source, target):
+                        continue
+                    if (source.key, target.key) in seen:
+                        continue
+                    seen.add((source.key, target.key))
+                    links.append({"from": source.key, "to": target.key, **LINK_STYLE})
+    return links
+
+
+def transitive_reduction(graph: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+    """Drop each edge of a graph that is implied by a longer path, keeping what every node can reach.
+
+    Each node's reachable set is a bitset built once in reverse topological order, so an edge is dropped
+    when its target can be reached from any of the node's other targets. Nodes in a cycle, which terraform
+    should never record, keep all their edges.
+    """
+    order = __topological_order(graph)
+    bits = {node: 1 << i for i, node in enumerate(order)}
+    reachable: Dict[str, int] = {}
+    reduced: Dict[str, List[str]] = {}
+
+    for node in reversed(order):
+        below = 0
+        for target in graph[node]:
+            below |= reachable.get(target, 0)
+        reachable[node] = below | sum(bits[x] for x in graph[node] if x in bits)
+        # a target is redundant when another target reaches it
+        reduced[node] = sorted(x for x in graph[node] if not below & bits.get(x, 0))
+
+    cyclic = [x for x in graph if not x in reachable]
+    if len(cyclic) > 0:
+        logging.warning(f"Dependencies of {', '.join(sorted(cyclic))} are in or behind a cycle, they are not reduced.")
+    for node in cyclic:
+        reduced[node] = sorted(graph[node])
+
+    return reduced
+
+
+def __topological_order(graph: Dict[str, Set[str]]) -> List[str]:
+    """Get the nodes with every node before those it points to, leaving out nodes in or behind a cycle."""
+    incoming = {node: 0 for node in graph}
+    for targets in graph.values():
+        for target in targets:
+            incoming[target] += 1
+
+    order = sorted(x for x, count in incoming.items() if count == 0)
+    i = 0
+    while i < len(order):
+        for target in sorted(graph[order[i]]):
+            incoming[target] -= 1
+            if incoming[target] == 0:
+                order.append(target)
+        i += 1
+    return order
+
+
+def __same_instance(calls: Dict[Optional[str], Tuple[Tuple[str, str], ...]], component: Component, other: Component) -> bool:
+    """Check if two components are in the same instance of the modules they share, e.g. module.app["a"].module.db
+    and module.app["a"] are while module.app["a"] and module.app["b"] are not."""
+    # each module path is parsed once
+    for module in (component.module, other.module):
+        if not module in calls:
+            calls[module] = tuple(MODULE_CALL.findall(module)) if module != None else ()
+    for (name, key), (other_name, other_key) in zip(calls[component.module], calls[other.module]):
+        if name != other_name:
+            return True
+        if key != other_key:
+            return False
+    return True
@@ -3,59 +3,44 @@ import sys
 import click
 import json
 import os
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, List, Optional, Tuple
+import collections
 import logging
+import re
+import subprocess
+import time
 
-from app.azure import azure
+from app.common import render_cache
 from app.common.component import Component
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
-from azure.mgmt.storage import StorageManagementClient
+from app.common.component_filter import ComponentFilter
+from app.common.inference import LinkInference
+from app.common.profiler import PROFILE_SUFFIX, Profiler
+from app.common.remote_state import fetch_state
+from app.common.resource import Resource
+from app.common.state import read_components
 
-UNPARENTED = "Unparented"
+OUTPUT_FORMAT = "png"
+LAYOUT_MODES = ("fixed", "adaptive")
+STATE_WORKERS = 8
 
-def commonDraw(name, state, platform, output_path, json_config_path, verbose):
+def commonDraw(name, state, platform, output_path, json_config_path, verbose, use_cache=True, profile=False, format=None,
+               layout=None, layout_budget=None, split=False, filters=None, label_width=None,
+               infer_links=False, dependencies=False):
     """Console script for drawtf."""
     # Set logging level
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    
+    profiler = Profiler()
         
     # Load the config if it exists
-    config_data = {}
-    if (not json_config_path is None):
-        logging.info(f"Reading config from {json_config_path}.")
-        
-        if (not os.path.exists(json_config_path)):
-            raise click.BadParameter(
-                message="The path to the config file does not exist.")
-      
-        try:
-            cf = open(json_config_path)
-            config_data = json.load(cf)
-        except ValueError:
-            click.secho(f"Error while reading config for {json_config_path}", fg='red')
-            return 1
-            
-    if ("base" in config_data):
-        base_path = config_data['base']
-        logging.info(f"Reading base config from {base_path}.")
-        
-        if (not os.path.exists(base_path)):
-            raise click.BadParameter(
-                message="The path to the base configuration file does not exist.")
-        
-        # read base config and apply this config on top of it
-        
-        try:
-            cfo = open(base_path)
-            config_data_override = json.load(cfo)
-        except ValueError:
-            click.secho(f"Error while reading config for BASE {base_path}", fg='red')
-            return 1
-        
-        
-        config_data_override.update(config_data)
-        config_data = config_data_override
+    try:
+        with profiler.phase("config_load"):
+            config_data = load_config(json_config_path)
+    except ValueError as e:
+        click.secho(str(e), fg='red')
+        return 1
         
     # Take name from cli if not in config, default to 'design'
     if (name == None and "name" in config_data):
@@ -64,42 +49,12 @@ def commonDraw(name, state, platform, output_path, json_config_path, verbose):
     if (name == None):
         name = "design"
         
-    # Take name from cli if not in config, default to '[]' if nothing found
-    if (state == None and "state" in config_data):
-        state = config_data["state"]
-    
-    data = {
-        "resources": []
-    }
-    
-    if (not state == None and not os.path.exists(state)):
-        click.secho("The path to the state file does not exist.", fg='red')
-        if ("storage-azure" in config_data):
-            storage_config = config_data["storage-azure"]
-            remote_state = str(state).strip("./")
-            click.secho(f"Checking if file '{remote_state}' exists on storage container '{storage_config['account']}/{storage_config['container']}'.", fg='yellow')
-            default_credential = DefaultAzureCredential()
-            storage_client = StorageManagementClient(default_credential, storage_config['subscription-id'])
-            storage_keys = storage_client.storage_accounts.list_keys(storage_config['resource-group'], storage_config['account'])
-            storage_keys = {v.key_name: v.value for v in storage_keys.keys}  # type: ignore
-            connection = f"DefaultEndpointsProtocol=https;AccountName={storage_config['account']};AccountKey={storage_keys['key1']};EndpointSuffix=core.windows.net"
-            blob_service_client = BlobServiceClient.from_connection_string(connection)
-            container_client = blob_service_client.get_container_client(storage_config['container'])
-            blob_client = container_client.get_blob_client(remote_state)
-            
-            if blob_client.exists():
-                click.secho(f"Found state file '{remote_state}' on container '{storage_config['account']}/{storage_config['container']}'.", fg='green')
-                blob_data = blob_client.download_blob()
-                data_bytes = blob_data.readall()
-                data = json.loads(data_bytes.decode('utf-8'))
-            else:
-                click.secho(f"Blob '{remote_state}' doesn't exist on '{storage_config['account']}/{storage_config['container']}'.", fg='red')
-        else:
-            click.secho("No storage container or store connection string defined.", fg='red')
-    else:
-        if (not state == None):
-            f = open(state)
-            data = json.load(f)
+    # Take state from cli if not in config, it can be a single state or a list of them
+    try:
+        state_refs = state_references(state, config_data)
+    except ValueError as e:
+        click.secho(str(e), fg='red')
+        return 1
     
     # Take platform from cli if not in config, or default to 'azure'
     if ("platform" in config_data):
@@ -114,65 +69,296 @@ def commonDraw(name, state, platform, output_path, json_config_path, verbose):
         
     if (output_path == None and not json_config_path == None):
         output_path = os.path.splitext(json_config_path)[0]
+    
+    # Take formats from cli if not in config, a comma separated string or a list, default to 'png'
+    if (format == None and "format" in config_data):
+        format = config_data["format"]
+    
+    formats = output_formats(format)
+    from app.common.render import FORMATS
+    invalid = [x for x in formats if not x in FORMATS]
+    if (len(invalid) > 0):
+        click.secho(f"Output format {', '.join(invalid)} is not supported, use one or more of {', '.join(FORMATS)}.", fg='red')
+        return 1
+    
+    # Take layout mode and budget from cli if not in config, default to the fixed layout with no budget
+    if (layout == None and "layout" in config_data):
+        layout = config_data["layout"]
         
-    # Take excludes if exists
-    excludes = []
-    if ("excludes" in config_data):
-        excludes = config_data["excludes"]
+    if (layout == None):
+        layout = "fixed"
+    
+    if (not layout in LAYOUT_MODES):
+        click.secho(f"Layout {layout} is not supported, use one of {', '.join(LAYOUT_MODES)}.", fg='red')
+        return 1
+    
+    if (layout_budget == None and "layoutBudget" in config_data):
+        layout_budget = float(config_data["layoutBudget"])
+    
+    # Split into a diagram per resource group if set on the cli or in config
+    if (not split and "split" in config_data):
+        split = bool(config_data["split"])
+        
+    # Take the label width from cli if not in config, default to 25 characters
+    if (label_width == None and "labelWidth" in config_data):
+        label_width = config_data["labelWidth"]
+    
+    try:
+        Resource.set_label_width(label_width)
+    except ValueError as e:
+        click.secho(str(e), fg='red')
+        return 1
+    
+    # Take excludes and other filters from config, adding those from cli
+    try:
+        component_filter = ComponentFilter.from_config(config_data, **(filters or {}))
+    except re.error as e:
+        click.secho(f"Invalid filter pattern: {e}", fg='red')
+        return 1
+    
+    # Infer links from the resource ids in attributes if set on the cli or in config
+    inference = LinkInference.from_config(config_data.get("inferLinks", False) or infer_links)
+    
+    # Link resources by their terraform dependencies if set on the cli or in config
+    if (not dependencies and "dependencies" in config_data):
+        dependencies = bool(config_data["dependencies"])
     
     supported_nodes = []
+    projection = None
     if (platform.lower() == 'azure'):
+        from app.azure import azure
         supported_nodes = azure.supported_nodes()
+        projection = azure.projection
+        if (not inference == None):
+            # the reference attributes are dropped otherwise
+            projection = inference.projection(projection)
     else:
         raise Exception(f"Platform {platform} is not yet supported.")
     
+    # Fetch every state at once, remote ones spend most of their time waiting on storage
+    state_files: List[IO] = []
+    with profiler.phase("state_fetch"), ThreadPoolExecutor(max_workers=max(1, min(len(state_refs), STATE_WORKERS))) as executor:
+        for state_file in executor.map(lambda x: __open_state(*x), state_refs):
+            if (not state_file is None):
+                state_files.append(state_file)
+    
+    # Skip the render if nothing going into it has changed since the last one, a profiled draw always renders
+    render_key = None
+    output_files = None
+    if (use_cache and not profile and not output_path == None):
+        output_files = [f"{output_path}.{x}" for x in formats]
+        settings = {
+            "config": config_data,
+            "name": name,
+            "platform": platform,
+            "output_path": output_path,
+            "format": formats,
+            "layout": layout,
+            "layout_budget": layout_budget,
+            "split": split,
+            "filters": filters,
+            "label_width": Resource.label_width,
+            "infer_links": infer_links,
+            "dependencies": dependencies
+        }
+        render_key = render_cache.render_key(settings, state_files)
+        if render_cache.is_cached(render_key, output_files):
+            for state_file in state_files:
+                state_file.close()
+            click.secho(f"No changes since the last draw of {', '.join(output_files)}, skipping.", fg='green')
+            return 0
+    
     components: List[Component] = []
 
-    for resource in data["resources"]:
-        resource_name = resource["name"]
-        type = resource["type"]
-        mode = "manual"
-        if ("mode" in resource):
-            mode = resource["mode"]
-
-        if (not type in supported_nodes):
-            click.echo(f"Resource type {type} is not supported.")
-            continue
-
-        for instance in resource["instances"]:
-            attributes = instance["attributes"]
-            if (not "resource_group_name" in attributes):
-                resource_group_name = UNPARENTED
-            else:
-                resource_group_name = attributes["resource_group_name"]
-
-            if ("name" in attributes):
-                resource_name = attributes["name"]
-
-            component = Component(resource_name, type,
-                              mode, resource_group_name, attributes);
-            
-            if (not component.key in excludes):
-                click.echo(f"Adding resource {component.key}")
-                components.append(component)
-            else:
-                click.echo(f"Excluding resource {component.key}")
+    # Parse the states concurrently, merging them in the order they are listed
+    with ThreadPoolExecutor(max_workers=max(1, min(len(state_files), STATE_WORKERS))) as executor:
+        state_components = list(executor.map(lambda x: __read_state(x, supported_nodes, projection, component_filter, dependencies, profiler if profile else None), state_files))
+    
+    # excluded resources were dropped as the states were read, only those from config are left to filter
+    with profiler.phase("merge"):
+        components.extend(merge_states(state_components))
 
     links = None
     if "links" in config_data:
         links = config_data["links"]
     if "components" in config_data:
-        custom_components = __get_custom_components(excludes, supported_nodes, config_data)
+        with profiler.phase("exclusion"):
+            custom_components = __get_custom_components(component_filter, supported_nodes, config_data)
         components = components + custom_components
+    
+    component_types = collections.Counter(__component_types(components))
+    profiler.count("states", len(state_files))
+    profiler.count("components", sum(component_types.values()))
+    profiler.count("components_per_type", dict(component_types))
             
     if (platform.lower() == 'azure'): 
-        azure.draw(name, output_path, components, links)
+        try:
+            output_paths = azure.draw(name, output_path, components, links, profiler, formats, layout == "adaptive", layout_budget, split,
+                                      inference=inference, dependencies=dependencies)
+        except subprocess.TimeoutExpired:
+            click.secho(f"Layout did not finish within {layout_budget}s even with the cheapest settings, or an image write ran over it.", fg='red')
+            return 1
     else:
         raise Exception(f"Platform {platform} is not yet supported.")
 
+    if (not render_key is None and not output_files is None):
+        # a split draw also writes a diagram per group, unknown until the state has been read
+        group_files = [f"{x}.{y}" for x in output_paths[1:] for y in formats]
+        render_cache.store(render_key, output_files, group_files)
+    
+    if (profile):
+        profile_path = f"{output_paths[0]}{PROFILE_SUFFIX}"
+        profiler.write(profile_path)
+        click.secho(f"Profile written to {profile_path}.", fg='green')
+
     return 0
 
-def __get_custom_components(excludes, supported_nodes, config_data: Dict) -> List[Component]:
+def load_config(json_config_path) -> Dict:
+    """Read a config file, applying it on top of its base config if it has one."""
+    config_data = {}
+    if (json_config_path is None):
+        return config_data
+    
+    logging.info(f"Reading config from {json_config_path}.")
+    
+    if (not os.path.exists(json_config_path)):
+        raise click.BadParameter(
+            message="The path to the config file does not exist.")
+  
+    try:
+        with open(json_config_path) as cf:
+            config_data = json.load(cf)
+    except ValueError:
+        raise ValueError(f"Error while reading config for {json_config_path}")
+            
+    if ("base" in config_data):
+        base_path = config_data['base']
+        logging.info(f"Reading base config from {base_path}.")
+        
+        if (not os.path.exists(base_path)):
+            raise click.BadParameter(
+                message="The path to the base configuration file does not exist.")
+        
+        # read base config and apply this config on top of it
+        
+        try:
+            with open(base_path) as cfo:
+                config_data_override = json.load(cfo)
+        except ValueError:
+            raise ValueError(f"Error while reading config for BASE {base_path}")
+        
+        config_data_override.update(config_data)
+        config_data = config_data_override
+    
+    return config_data
+
+def output_formats(format) -> List[str]:
+    """Get the formats to write from a comma separated string or a list, without duplicates."""
+    if (format == None):
+        return [OUTPUT_FORMAT]
+    
+    if (not isinstance(format, list)):
+        format = str(format).split(",")
+    
+    formats = []
+    for x in format:
+        x = x.strip().lower()
+        if (not x == "" and not x in formats):
+            formats.append(x)
+    return formats if len(formats) > 0 else [OUTPUT_FORMAT]
+
+def state_references(state, config_data: Dict) -> List[Tuple[str, Optional[Dict]]]:
+    """Get each state to draw with the storage to read it from when it is not on disk.
+
+    The state may be a single path or a list, an entry in the list can be a path or an object
+    with a path and its own storage-azure, for states kept in other accounts or containers.
+    Raises ValueError for an entry that is neither.
+    """
+    if (state == None and "state" in config_data):
+        state = config_data["state"]
+        
+    if (state == None):
+        return []
+    
+    if (not isinstance(state, list)):
+        state = [state]
+    
+    storage_config = config_data.get("storage-azure")
+    refs = []
+    for entry in state:
+        if (isinstance(entry, dict)):
+            if (not isinstance(entry.get("path"), str)):
+                raise ValueError(f"State entry {json.dumps(entry)} has no path, give the path of the state or its blob.")
+            refs.append((entry["path"], entry.get("storage-azure", storage_config)))
+        else:
+            refs.append((entry, storage_config))
+    return refs
+
+def __open_state(state: str, storage_config: Optional[Dict]) -> Optional[IO]:
+    """Open a local state, or fetch it from storage when it is not on disk."""
+    if (os.path.exists(state)):
+        return open(state, 'rb')
+    
+    click.secho(f"The path to the state file {state} does not exist.", fg='red')
+    if (storage_config == None):
+        click.secho("No storage container or store connection string defined.", fg='red')
+        return None
+    
+    remote_state = str(state).strip("./")
+    return fetch_state(storage_config, remote_state)
+
+def merge_states(state_components: List[List[Component]]) -> List[Component]:
+    """Merge the components read from each state, a resource found in several states is kept once.
+
+    Resources match on their ARM id, or their key when they have none. The managed resource is kept over
+    a data source reading it, e.g. a shared key vault managed in one workspace and read by another.
+    Resources repeated within one state are all kept, as they were before states could be merged.
+    """
+    merged: Dict[str, Tuple[int, int]] = {}
+    components: List[Component] = []
+    for state, state_list in enumerate(state_components):
+        for component in state_list:
+            component_id = component.attributes.get("id") if component.attributes else None
+            identity = component_id.lower() if isinstance(component_id, str) else component.key
+            
+            first = merged.get(identity)
+            if (first == None or first[0] == state):
+                click.echo(f"Adding resource {component.key}")
+                merged.setdefault(identity, (state, len(components)))
+                components.append(component)
+                continue
+            
+            index = first[1]
+            if (components[index].mode == "data" and component.mode != "data"):
+                click.echo(f"Replacing data resource {components[index].key} with managed resource {component.key}")
+                components[index] = component
+            else:
+                click.echo(f"Skipping duplicate resource {component.key}")
+    return components
+
+def __read_state(state_file: IO, supported_nodes, projection, component_filter: ComponentFilter, dependencies: bool,
+                 profiler: Optional[Profiler] = None) -> List[Component]:
+    """Read all the components from a state, closing it when done."""
+    with state_file:
+        if (profiler == None):
+            return list(read_components(state_file, supported_nodes, None, projection, component_filter, dependencies))
+        
+        # split the read into parsing and building components, timed on this thread as states are read at once
+        extraction = {"wall": 0.0, "cpu": 0.0}
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        components = list(read_components(state_file, supported_nodes, extraction, projection, component_filter, dependencies))
+        profiler.add("json_parse", time.perf_counter() - wall - extraction["wall"], time.thread_time() - cpu - extraction["cpu"])
+        profiler.add("component_extraction", extraction["wall"], extraction["cpu"])
+        return components
+
+def __component_types(components: List[Component]):
+    """Get the type of every component, including those nested in custom components."""
+    for component in components:
+        yield component.type
+        yield from __component_types(component.components)
+
+def __get_custom_components(component_filter: ComponentFilter, supported_nodes, config_data: Dict) -> List[Component]:
     new_components = []
     
     if not "components" in config_data:
@@ -201,11 +387,11 @@ def __get_custom_components(excludes, supported_nodes, config_data: Dict) -> Lis
         
         child_config_components = []
         if ("components" in instance):
-            child_config_components = __get_custom_components(excludes, supported_nodes, instance)
+            child_config_components = __get_custom_components(component_filter, supported_nodes, instance)
         
         component = Component(resource_name, type, mode, resource_group_name, attributes, child_config_components, custom)
         
-        if (not component.key in excludes):
+        if (component_filter.allows_component(component)):
             click.echo(f"Adding resource (from config) {component.key}")
             new_components.append(component)
         else:
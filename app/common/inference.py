@@ -0,0 +1,123 @@
+"""Infer links between components from the resource ids their attributes reference."""
+
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.common.component import Component
+from app.common.component_filter import Matcher, TypeFilter
+from app.common.component_index import ComponentTree
+
+# attributes holding references, e.g. key_vault_id, subnet_ids, kept when the state is projected
+REFERENCE_SUFFIXES = ("_id", "_ids")
+
+# every azure resource id starts with this
+ID_PREFIX = "/subscriptions/"
+
+LINK_STYLE = {"type": "dotted", "color": "gray40"}
+
+
+class KeepReferences:
+    """Attributes kept for a type along with any attribute that can hold a reference."""
+
+    def __init__(self, kept: Collection[str]):
+        """Ctor for keep references."""
+        self.kept = kept
+
+    def __contains__(self, attribute: object) -> bool:
+        return attribute in self.kept or (isinstance(attribute, str) and attribute.endswith(REFERENCE_SUFFIXES))
+
+
+class LinkInference:
+    """Infer a link from each component to every component whose id one of its attributes references.
+
+    Only attributes ending _id or _ids are read, references to a component a resource is nested in, or
+    nested in it, are already shown by the nesting and skipped. A reference to a child resource, such
+    as a key vault secret, links to the nearest resource it is part of that was drawn.
+    """
+
+    def __init__(self, include_types: Collection[str] = (), exclude_types: Collection[str] = (),
+                 include_attributes: Collection[str] = (), exclude_attributes: Collection[str] = ()):
+        """Ctor for link inference."""
+        self.types = TypeFilter(include_types, exclude_types)
+        self.include_attributes = Matcher(include_attributes)
+        self.exclude_attributes = Matcher(exclude_attributes)
+
+    @staticmethod
+    def from_config(value: Union[bool, Dict[str, Any], None]) -> Optional["LinkInference"]:
+        """Create the inference from the inferLinks config, true or an object of type and attribute lists."""
+        if not value:
+            return None
+        if not isinstance(value, dict):
+            return LinkInference()
+        return LinkInference(value.get("includeTypes", []), value.get("excludeTypes", []),
+                             value.get("includeAttributes", []), value.get("excludeAttributes", []))
+
+    def projection(self, projection: Optional[Callable[[str], Optional[Collection[str]]]]):
+        """Wrap a projection so the attributes references are read from are kept."""
+        if projection == None:
+            return None
+
+        def keep_references(type: str) -> Optional[Collection[str]]:
+            kept = projection(type)  # type: ignore
+            return kept if kept == None else KeepReferences(kept)  # type: ignore
+        return keep_references
+
+    def allows_type(self, type: str) -> bool:
+        """Check if links from and to a type are inferred."""
+        return self.types.allows(type)
+
+    def allows_attribute(self, attribute: str) -> bool:
+        """Check if links are inferred from an attribute."""
+        if not attribute.endswith(REFERENCE_SUFFIXES):
+            return False
+        return (not self.include_attributes or self.include_attributes.matches(attribute)) and not self.exclude_attributes.matches(attribute)
+
+    def infer(self, components: List[Component]) -> List[dict]:
+        """Get a link for each reference between the nested components, in one pass over them."""
+        ids: Dict[str, Component] = {}
+        tree = ComponentTree(components)
+        for component in tree.components:
+            component_id = component.attributes.get("id") if component.attributes else None
+            if isinstance(component_id, str) and self.allows_type(component.type):
+                ids.setdefault(component_id.lower(), component)
+
+        links = []
+        seen = set()
+        for component in tree.components:
+            if not component.attributes or not self.allows_type(component.type):
+                continue
+            for attribute, reference in self.__references(component.attributes):
+                target = self.__resolve(ids, reference)
+                if target == None or target is component:
+                    continue
+                if tree.related(component, target):  # type: ignore
+                    continue
+                if (component.key, target.key) in seen:  # type: ignore
+                    continue
+                seen.add((component.key, target.key))  # type: ignore
+                links.append({"from": component.key, "to": target.key, "label": attribute, **LINK_STYLE})  # type: ignore
+        return links
+
+    def __references(self, attributes: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """Get the resource ids referenced by the top level attributes, with the attribute they are in.
+
+        Blocks such as default_node_pool are not read, the projection decides what to keep from the key
+        alone so references nested in blocks are dropped as the state is parsed.
+        """
+        for attribute, value in attributes.items():
+            if attribute == "id" or not isinstance(attribute, str) or not self.allows_attribute(attribute):
+                continue
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, str) and item.startswith(ID_PREFIX):
+                    yield attribute, item
+
+    @staticmethod
+    def __resolve(ids: Dict[str, Component], reference: str) -> Optional[Component]:
+        """Get the component a resource id refers to, or the nearest one it is part of."""
+        reference = reference.lower().rstrip("/")
+        while reference.count("/providers/") > 0:
+            component = ids.get(reference)
+            if component != None:
+                return component
+            # drop the last type and name, e.g. /secrets/name of a key vault secret
+            reference = reference.rsplit("/", 2)[0]
+        return None
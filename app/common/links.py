@@ -0,0 +1,172 @@
+"""Expand links whose ends select several resources into links between resource keys."""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import json
+import logging
+
+from app.common.component import Component
+from app.common.component_filter import GLOB_CHARS, REGEX_PREFIX, Matcher, TagMatcher, resource_group_names
+
+Selector = Union[str, Dict[str, Union[str, List[str]]]]
+
+# fields of a selector, each an exact value, a glob or a regex, or a list of them
+SELECTOR_FIELDS = ("key", "type", "resourceGroup", "tag")
+
+# links to a cluster rather than the node drawn for it use its key with this prefix
+CLUSTER_PREFIX = "cluster-"
+
+
+class LinkIndex:
+    """Index the keys of every component by type, resource group and tag so a selector only checks the
+    components it can match, rather than every link being checked against every component.
+
+    A cluster is selected by its "cluster-" key when the key patterns match that key but not the key of
+    the component itself, so "cluster-rg-*" selects resource group clusters while "*" selects their nodes.
+    """
+
+    def __init__(self, components: Iterable[Component]):
+        """Ctor for link index."""
+        self.components: Dict[str, Component] = {}
+        self.by_type: Dict[str, List[str]] = {}
+        self.by_resource_group: Dict[str, List[str]] = {}
+        self.by_tag: Dict[Tuple[str, str], List[str]] = {}
+        self.clusters: Dict[str, str] = {}
+        self.__selected: Dict[str, List[str]] = {}
+        self.__add(components)
+
+    def select(self, selector: Selector) -> List[str]:
+        """Get the keys of the components a selector matches, selectors repeated across links are resolved once."""
+        memo = json.dumps(selector, sort_keys=True)
+        keys = self.__selected.get(memo)
+        if keys == None:
+            keys = self.__select(selector)
+            self.__selected[memo] = keys
+        return keys  # type: ignore
+
+    def __add(self, components: Iterable[Component]):
+        """Add components and everything nested in them."""
+        for component in components:
+            if not component.key in self.components:
+                self.components[component.key] = component
+                self.by_type.setdefault(component.type, []).append(component.key)
+                for resource_group in resource_group_names(component.name, component.type, component.resource_group):
+                    if isinstance(resource_group, str):
+                        self.by_resource_group.setdefault(resource_group.lower(), []).append(component.key)
+                if component.is_cluster():
+                    self.clusters[CLUSTER_PREFIX + component.key] = component.key
+                tags = component.attributes.get("tags") if component.attributes else None
+                for tag, value in (tags or {}).items():
+                    self.by_tag.setdefault((tag, str(value)), []).append(component.key)
+            self.__add(component.components)
+
+    def __select(self, selector: Selector) -> List[str]:
+        """Get the keys of the components a selector matches."""
+        if isinstance(selector, str):
+            if not is_pattern(selector):
+                # a plain key, left for the link to report if it was not drawn
+                return [selector]
+            selector = {"key": selector}
+
+        unknown = [x for x in selector if not x in SELECTOR_FIELDS]
+        if len(unknown) > 0:
+            logging.error(f"Unknown link selector fields {', '.join(unknown)} in {selector}")
+            return []
+
+        keys = Matcher(self.__patterns(selector.get("key")))
+        types = Matcher(self.__patterns(selector.get("type")))
+        resource_groups = Matcher(self.__patterns(selector.get("resourceGroup")), True)
+        tags = TagMatcher(self.__patterns(selector.get("tag")))
+
+        # start from the narrowest index an exact value can be looked up in
+        if types and types.pattern == None:
+            candidates = self.__union(self.by_type.get(x, []) for x in types.exact)
+        elif resource_groups and resource_groups.pattern == None:
+            candidates = self.__union(self.by_resource_group.get(x, []) for x in resource_groups.exact)
+        elif tags and len(tags.any_value) == 0 and all(x.pattern == None for x in tags.values.values()):
+            candidates = self.__union(self.by_tag.get((tag, x), []) for tag, values in tags.values.items() for x in values.exact)
+        elif keys and keys.pattern == None:
+            candidates = self.__union([self.clusters.get(x, x)] for x in keys.exact if x in self.components or x in self.clusters)
+        else:
+            candidates = list(self.components)
+
+        selected = []
+        for key in candidates:
+            component = self.components[key]
+            if types and not types.matches(component.type):
+                continue
+            if resource_groups and not any(resource_groups.matches(x) for x in resource_group_names(component.name, component.type, component.resource_group)):
+                continue
+            if tags and not tags.matches(component.attributes.get("tags") if component.attributes else None):
+                continue
+            if not keys or keys.matches(key):
+                selected.append(key)
+            elif component.is_cluster() and keys.matches(CLUSTER_PREFIX + key):
+                selected.append(CLUSTER_PREFIX + key)
+
+        return selected
+
+    @staticmethod
+    def __patterns(value: Optional[Union[str, List[str]]]) -> List[str]:
+        """Get the patterns of a selector field."""
+        if value == None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return list(value)
+
+    @staticmethod
+    def __union(lists: Iterable[List[str]]) -> List[str]:
+        """Join lists of keys, dropping repeats."""
+        return list(dict.fromkeys(x for y in lists for x in y))
+
+
+def is_pattern(selector: Selector) -> bool:
+    """Check if a link end selects components rather than naming one key."""
+    if isinstance(selector, dict):
+        return True
+    return selector.startswith(REGEX_PREFIX) or any(x in selector for x in GLOB_CHARS)
+
+
+def expand_links(links: Optional[List[dict]], components: List[Component]) -> Optional[List[dict]]:
+    """Expand every link with a selector at either end into a link per pair of matching components.
+
+    Links with plain keys at both ends are kept as they are. Duplicate links are dropped, as are links
+    from a component to itself made by a selector.
+    """
+    if links == None:
+        return links
+
+    index: Optional[LinkIndex] = None
+    expanded = []
+    seen = set()
+    for link in links:
+        if not ("from" in link and "to" in link):
+            # left for the link to report
+            expanded.append(link)
+            continue
+
+        selected = is_pattern(link["from"]) or is_pattern(link["to"])
+        if not selected:
+            sources, targets = [link["from"]], [link["to"]]
+        else:
+            if index == None:
+                index = LinkIndex(components)
+            sources, targets = index.select(link["from"]), index.select(link["to"])  # type: ignore
+            if len(sources) == 0 or len(targets) == 0:
+                logging.warning(f"Ignoring link as nothing matches its selectors: {link}")
+                continue
+
+        for source in sources:
+            for target in targets:
+                if selected and source == target:
+                    continue
+                edge = (source, target, link.get("label"), link.get("type"), link.get("color"))
+                if edge in seen:
+                    continue
+                seen.add(edge)
+                expanded.append(link if not selected else {**link, "from": source, "to": target})
+
+    if len(expanded) < len(links) or index != None:
+        logging.info(f"Expanded {len(links)} links to {len(expanded)}")
+    return expanded
+
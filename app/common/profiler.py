@@ -0,0 +1,84 @@
+"""Wall and cpu time of each phase of a draw."""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+import json
+import os
+import threading
+import time
+
+# written next to the design, draw-all and watch skip it as it is not a config
+PROFILE_SUFFIX = ".profile.json"
+
+
+class Profiler:
+    """Record the time spent in each phase of a draw along with counts describing the design.
+
+    Phases can be entered more than once and from several threads, their times add up. The cpu
+    time includes child processes waited on during the phase, so graphviz is counted.
+    """
+
+    def __init__(self):
+        """Ctor for profiler."""
+        self.__lock = threading.Lock()
+        self.__phases: Dict[str, Dict[str, float]] = {}
+        self.__counts: Dict[str, Any] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the code run inside the block as a phase."""
+        wall = time.perf_counter()
+        cpu = Profiler.__cpu_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, Profiler.__cpu_time() - cpu)
+
+    def add(self, name: str, wall: float, cpu: float):
+        """Add time to a phase."""
+        with self.__lock:
+            phase = self.__phases.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            phase["wall"] += wall
+            phase["cpu"] += cpu
+
+    def get(self, name: str) -> Dict[str, float]:
+        """Get the time recorded for a phase so far."""
+        with self.__lock:
+            return dict(self.__phases.get(name, {"wall": 0.0, "cpu": 0.0}))
+
+    def count(self, name: str, value: Any):
+        """Record a count describing the design, e.g. clusters or edges."""
+        with self.__lock:
+            self.__counts[name] = value
+
+    def merge(self, report: dict):
+        """Add the phases and counts from the report of another profiler, e.g. one run in a worker process."""
+        for name, phase in report.get("phases", {}).items():
+            self.add(name, phase["wall"], phase["cpu"])
+
+        with self.__lock:
+            for name, value in report.get("counts", {}).items():
+                if (isinstance(value, (int, float)) and isinstance(self.__counts.get(name, 0), (int, float))):
+                    self.__counts[name] = self.__counts.get(name, 0) + value
+                else:
+                    self.__counts.setdefault(name, value)
+
+    def report(self) -> dict:
+        """Get the phases, their totals and the counts."""
+        with self.__lock:
+            phases = {k: {"wall": round(v["wall"], 6), "cpu": round(v["cpu"], 6)} for k, v in self.__phases.items()}
+            total = {
+                "wall": round(sum(x["wall"] for x in self.__phases.values()), 6),
+                "cpu": round(sum(x["cpu"] for x in self.__phases.values()), 6)
+            }
+            return {"phases": phases, "total": total, "counts": dict(self.__counts)}
+
+    def write(self, path: str):
+        """Write the report as json."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    @staticmethod
+    def __cpu_time() -> float:
+        """Get the cpu time of this process and its finished children."""
+        times = os.times()
+        return time.process_time() + times.children_user + times.children_system
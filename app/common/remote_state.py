@@ -0,0 +1,101 @@
+"""Fetch tfstate files from azure storage, keeping a local copy per blob."""
+from typing import IO, Optional
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import click
+
+from app.common.client_pool import POOL
+from app.common.render_cache import cache_dir
+
+DOWNLOAD_CONCURRENCY = 8
+
+# states hold secrets in plain text, only the current user can read the cached copies
+DIRECTORY_MODE = 0o700
+FILE_MODE = 0o600
+
+
+def fetch_state(storage_config: dict, remote_state: str) -> Optional[IO]:
+    """Open a remote state, only downloading it if the blob has changed since the last fetch."""
+    # the azure sdk is slow to import, only load it when remote state is used
+    from azure.core import MatchConditions
+    from azure.core.exceptions import ClientAuthenticationError, HttpResponseError, ResourceNotFoundError
+
+    account = storage_config['account']
+    container = storage_config['container']
+    click.secho(f"Checking if file '{remote_state}' exists on storage container '{account}/{container}'.", fg='yellow')
+
+    cached = storage_config.get('cache', True)
+    state_path, entry_path = __cache_paths(account, container, remote_state)
+    etag = __cached_etag(state_path, entry_path) if cached else None
+    options = {"max_concurrency": storage_config.get('max-concurrency', DOWNLOAD_CONCURRENCY)}
+    if etag != None:
+        options.update({"etag": etag, "match_condition": MatchConditions.IfModified})
+
+    try:
+        try:
+            downloader = POOL.get_blob_client(storage_config, remote_state).download_blob(**options)
+        except ClientAuthenticationError:
+            # pooled account keys may have been rotated, fetch them again and retry once
+            POOL.invalidate(storage_config)
+            downloader = POOL.get_blob_client(storage_config, remote_state).download_blob(**options)
+    except ResourceNotFoundError:
+        click.secho(f"Blob '{remote_state}' doesn't exist on '{account}/{container}'.", fg='red')
+        return None
+    except HttpResponseError as e:
+        # storage reports a 304 as a plain http error rather than ResourceNotModifiedError
+        if e.status_code != 304:
+            raise
+        click.secho(f"State file '{remote_state}' on container '{account}/{container}' unchanged, using cached copy.", fg='green')
+        return open(state_path, 'rb')
+
+    click.secho(f"Found state file '{remote_state}' on container '{account}/{container}'.", fg='green')
+    if not cached:
+        # an unnamed file only the current user can read, removed once it is closed
+        state_file = tempfile.TemporaryFile()
+        downloader.readinto(state_file)
+        state_file.seek(0)
+        return state_file
+
+    os.makedirs(os.path.dirname(state_path), mode=DIRECTORY_MODE, exist_ok=True)
+    # makedirs leaves an existing directory as it is and applies the umask to a new one
+    os.chmod(os.path.dirname(state_path), DIRECTORY_MODE)
+
+    # ranged chunks are fetched in parallel and written straight to disk, the parser then streams
+    # from the file so the state is never held in memory, write then rename so parallel draws
+    # never read a partial state, the thread is part of the name as one draw can fetch several states
+    temp_path = f"{state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE), 'wb') as f:
+            downloader.readinto(f)
+        os.replace(temp_path, state_path)
+    except BaseException:
+        # a partial download holds part of the state, secrets included
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    with os.fdopen(os.open(entry_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE), 'w') as f:
+        json.dump({"etag": downloader.properties.etag, "blob": f"{account}/{container}/{remote_state}"}, f)
+
+    return open(state_path, 'rb')
+
+
+def __cache_paths(account: str, container: str, remote_state: str):
+    """Get the cached state and its etag entry for a blob."""
+    name = hashlib.sha256(f"{account}/{container}/{remote_state}".encode("utf-8")).hexdigest()
+    directory = os.path.join(cache_dir(), "states")
+    return os.path.join(directory, f"{name}.tfstate"), os.path.join(directory, f"{name}.json")
+
+
+def __cached_etag(state_path: str, entry_path: str) -> Optional[str]:
+    """Get the etag of the cached copy, if there is one."""
+    if not os.path.exists(state_path):
+        return None
+    try:
+        with open(entry_path) as f:
+            return json.load(f).get("etag")
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,146 @@
+"""Render diagrams with graphviz, timing the render or laying out once and writing each image from the laid out graph."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import logging
+import subprocess
+
+from diagrams import Diagram
+from graphviz import ExecutableNotFound
+
+from app.common.profiler import Profiler
+
+# dot is the laid out graph itself, written without rasterising
+FORMATS = ("png", "jpg", "svg", "pdf", "dot")
+
+# the engine used when the graph does not set one
+LAYOUT_ENGINE = "dot"
+
+# layout settings from the best looking to the cheapest, the layout is the engine passed to graphviz, orthogonal edges get very slow as the graph grows,
+# sfdp is the last resort as it scales best but does not draw clusters
+LAYOUT_STRATEGIES = [
+    {"layout": "dot", "splines": "ortho"},
+    {"layout": "dot", "splines": "polyline", "newrank": "true"},
+    {"layout": "dot", "splines": "spline", "newrank": "true"},
+    {"layout": "sfdp", "splines": "line", "overlap": "prism"},
+]
+
+# largest graphs, as (nodes, edges), each strategy is picked for in adaptive mode
+LAYOUT_LIMITS = [
+    (500, 100),
+    (2000, 1000),
+    (10000, 5000),
+]
+
+
+class TimedDiagram(Diagram):
+    """Diagram that times its render, graphviz lays out and writes the image in one run so the two are timed together."""
+
+    def __init__(self, *args, profiler: Optional[Profiler] = None, **kwargs):
+        """Ctor for timed diagram."""
+        super().__init__(*args, **kwargs)
+        self.profiler = profiler if profiler != None else Profiler()
+
+    def render(self):
+        """Render as the base diagram does."""
+        with self.profiler.phase("graphviz_render"):
+            super().render()
+
+
+class LaidOutDiagram(TimedDiagram):
+    """Diagram that runs the graphviz layout and the image writes as separate steps, laying out once for every format."""
+
+    def __init__(self, *args, formats: Optional[List[str]] = None, **kwargs):
+        """Ctor for laid out diagram."""
+        super().__init__(*args, **kwargs)
+        self.formats = formats if formats != None else [self.outformat]
+        for format in self.formats:
+            if (not format in FORMATS):
+                raise ValueError(f'"{format}" is not a valid output format')
+        self.strategy: Optional[int] = None
+        self.budget: Optional[float] = None
+
+    def render(self):
+        """Lay out the graph once then write every format from it."""
+        # the engine is passed on the command line, left in the graph it would be copied into the laid out
+        # graph and override the -Kneato -n2 the images are written with, laying the graph out again
+        self.engine = self.dot.graph_attr.pop("layout", LAYOUT_ENGINE)
+        # the source is saved as the base diagram does, it is removed once the diagram is closed
+        self.dot.save()
+
+        with self.profiler.phase("graphviz_layout"):
+            laid_out = self.__layout()
+
+        # the images are written at once, so the budget bounds them as a whole as it does each layout
+        with self.profiler.phase("image_write"):
+            write_images(laid_out, self.filename, self.formats, self.budget)
+
+    def __layout(self) -> bytes:
+        """Lay out with the chosen strategy, falling back to cheaper ones each time the budget runs out."""
+        if (self.strategy == None and self.budget == None):
+            return layout(self.dot.source.encode("utf-8"), engine=self.engine)
+
+        strategy = self.strategy if self.strategy != None else 0
+        while True:
+            settings = dict(LAYOUT_STRATEGIES[strategy])
+            engine = settings.pop("layout")
+            self.dot.graph_attr.update(settings)
+            self.profiler.count("layout_strategy", LAYOUT_STRATEGIES[strategy])
+            try:
+                return layout(self.dot.source.encode("utf-8"), self.budget, engine)
+            except subprocess.TimeoutExpired:
+                if (strategy == len(LAYOUT_STRATEGIES) - 1):
+                    raise
+                logging.warning(f"Layout with {LAYOUT_STRATEGIES[strategy]} took over {self.budget}s, retrying with cheaper settings.")
+                strategy += 1
+
+
+def choose_strategy(nodes: int, edges: int) -> int:
+    """Pick the best looking layout strategy expected to finish quickly for a graph of this size."""
+    for strategy, (max_nodes, max_edges) in enumerate(LAYOUT_LIMITS):
+        if (nodes <= max_nodes and edges <= max_edges):
+            return strategy
+    return len(LAYOUT_STRATEGIES) - 1
+
+
+def layout(source: bytes, timeout: Optional[float] = None, engine: str = LAYOUT_ENGINE) -> bytes:
+    """Run the layout with an engine such as dot or sfdp, returning the graph with every node and edge positioned.
+
+    The layout is killed and subprocess.TimeoutExpired raised if it runs longer than the timeout.
+    """
+    return __run(["dot", f"-K{engine}", "-Tdot"], source, timeout)
+
+
+def write_images(laid_out: bytes, filename: str, formats: List[str], timeout: Optional[float] = None):
+    """Write each format from a laid out graph, the images are written at once.
+
+    Each write is killed and subprocess.TimeoutExpired raised if it runs longer than the timeout.
+    """
+    images = [x for x in formats if x != "dot"]
+
+    if ("dot" in formats):
+        with open(f"{filename}.dot", "wb") as f:
+            f.write(laid_out)
+
+    if (len(images) == 1):
+        write_image(laid_out, f"{filename}.{images[0]}", images[0], timeout)
+    elif (len(images) > 1):
+        with ThreadPoolExecutor(max_workers=len(images)) as executor:
+            # list so a failure in any of them is raised
+            list(executor.map(lambda x: write_image(laid_out, f"{filename}.{x}", x, timeout), images))
+
+
+def write_image(laid_out: bytes, output_file: str, format: str, timeout: Optional[float] = None):
+    """Write an image from a laid out graph without laying it out again."""
+    __run(["dot", "-Kneato", "-n2", f"-T{format}", "-o", output_file], laid_out, timeout)
+
+
+def __run(cmd, source: bytes, timeout: Optional[float] = None) -> bytes:
+    """Run a graphviz command over a graph, raising with its errors if it fails."""
+    try:
+        proc = subprocess.run(cmd, input=source, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    except FileNotFoundError:
+        raise ExecutableNotFound(cmd)
+
+    if (proc.returncode != 0):
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output=proc.stdout, stderr=proc.stderr)
+    return proc.stdout
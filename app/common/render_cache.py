@@ -0,0 +1,73 @@
+"""On-disk cache of rendered designs keyed by a hash of their inputs."""
+from typing import IO, List, Optional
+import hashlib
+import json
+import os
+
+from app import __version__
+
+CACHE_DIR_ENV = "DRAWTF_CACHE_DIR"
+CHUNK_SIZE = 1024 * 1024
+
+
+def cache_dir() -> str:
+    """Get the cache directory, DRAWTF_CACHE_DIR or the user cache folder."""
+    if CACHE_DIR_ENV in os.environ:
+        return os.environ[CACHE_DIR_ENV]
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "drawtf")
+
+
+def render_key(settings: dict, state_files: List[IO]) -> str:
+    """Hash the resolved settings, the content of each state and the drawtf version."""
+    digest = hashlib.sha256()
+    digest.update(__version__.encode("utf-8"))
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+
+    for state_file in state_files:
+        for chunk in iter(lambda: state_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+        state_file.seek(0)
+        # keep the boundary between states so moving resources between them changes the key
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def is_cached(key: str, output_files: List[str]) -> bool:
+    """Check every output, and any other file stored with them, exists and was rendered from the same inputs."""
+    if not all(os.path.exists(x) for x in output_files):
+        return False
+
+    try:
+        with open(__entry_path(output_files)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    mtimes = entry.get("mtimes", {})
+    files = set(output_files) | set(mtimes.keys())
+    return entry.get("key") == key and all(os.path.exists(x) and mtimes.get(x) == os.path.getmtime(x) for x in files)
+
+
+def store(key: str, output_files: List[str], other_files: Optional[List[str]] = None):
+    """Record the key the outputs were rendered from, other files are checked with them but do not identify the entry."""
+    files = output_files + (other_files if other_files != None else [])
+    if not all(os.path.exists(x) for x in files):
+        return
+
+    entry_path = __entry_path(output_files)
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+    # write then rename so parallel draws never see a partial entry
+    temp_path = f"{entry_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"key": key, "mtimes": {x: os.path.getmtime(x) for x in files}}, f)
+    os.replace(temp_path, entry_path)
+
+
+def __entry_path(output_files: List[str]) -> str:
+    """Get the cache entry for a set of output files."""
+    paths = "\n".join(sorted(os.path.abspath(x) for x in output_files))
+    name = hashlib.sha256(paths.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir(), "renders", f"{name}.json")
@@ -0,0 +1,145 @@
+"""Debounced queue of draws for watch mode."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+# draws start from a server process forked before any thread of the watch, rather than forking the
+# watch itself while its observer, dispatcher and worker threads hold locks
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class RenderQueue:
+    """Coalesce bursts of events per path into one draw, run on a bounded pool of workers.
+
+    Each draw runs in its own process, when a newer event arrives for a path that is
+    still drawing the stale draw is killed along with any graphviz process it started.
+    The render callable and what prepare returns are handed to that process, so they
+    must be picklable.
+    An optional prepare callable runs in this process first, its result is handed to the
+    draw so state worth keeping between draws, like pooled credentials, outlives them.
+    """
+
+    def __init__(self, render: Callable[[str, str, Any], None], delay: float = 1.0, workers: int = 2,
+                 prepare: Optional[Callable[[str], Any]] = None):
+        """Ctor for render queue."""
+        self.__render = render
+        self.__prepare = prepare
+        self.__delay = delay
+        self.__executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drawtf-render")
+        self.__condition = threading.Condition()
+        self.__pending: Dict[str, Tuple[float, str]] = {}
+        self.__running: Set[str] = set()
+        self.__processes: Dict[str, multiprocessing.Process] = {}
+        self.__superseded: Set[str] = set()
+        self.__stopped = False
+        self.__context = multiprocessing.get_context(START_METHOD)
+        self.__dispatcher = threading.Thread(target=self.__dispatch, name="drawtf-dispatch", daemon=True)
+        self.__dispatcher.start()
+
+    def submit(self, path: str, reason: str):
+        """Queue a draw of the path once its events have been quiet for the delay."""
+        with self.__condition:
+            self.__pending[path] = (time.monotonic() + self.__delay, reason)
+            if path in self.__running:
+                # a draw still being prepared or started is stopped once its process is known
+                self.__superseded.add(path)
+            if path in self.__processes:
+                RenderQueue.__kill(self.__processes[path])
+            self.__condition.notify()
+
+    def stop(self):
+        """Stop dispatching, killing any running draws and waiting for them to exit."""
+        with self.__condition:
+            self.__stopped = True
+            for process in self.__processes.values():
+                RenderQueue.__kill(process)
+            self.__condition.notify()
+        self.__dispatcher.join()
+        self.__executor.shutdown(wait=True)
+
+    def __dispatch(self):
+        """Hand paths whose delay has passed to the workers, one draw per path at a time."""
+        with self.__condition:
+            while not self.__stopped:
+                now = time.monotonic()
+                timeout = None
+
+                for path, (deadline, reason) in list(self.__pending.items()):
+                    if path in self.__running:
+                        # picked up again once the running draw finishes
+                        continue
+                    if deadline <= now:
+                        del self.__pending[path]
+                        self.__running.add(path)
+                        self.__executor.submit(self.__run, path, reason)
+                    elif timeout == None or deadline - now < timeout:
+                        timeout = deadline - now
+
+                self.__condition.wait(timeout)
+
+    def __run(self, path: str, reason: str):
+        """Draw a path in a child process, waiting on it from a worker thread."""
+        try:
+            prepared = None
+            if self.__prepare != None:
+                prepared = self.__prepare(path)
+
+            with self.__condition:
+                if self.__stopped or path in self.__superseded:
+                    return
+
+            # not a daemon, a split draw starts workers of its own and daemons may not have children,
+            # stop kills every draw so none outlive the queue
+            process = self.__context.Process(target=_draw_process, args=(self.__render, path, reason, prepared))
+            process.start()
+
+            with self.__condition:
+                self.__processes[path] = process
+                if self.__stopped or path in self.__superseded:
+                    RenderQueue.__kill(process)
+
+            process.join()
+
+            with self.__condition:
+                if path in self.__superseded:
+                    logging.warning(f"Stopped drawing {path} as it has changed again.")
+                elif process.exitcode != 0:
+                    logging.error(f"Drawing {path} failed with exit code {process.exitcode}.")
+        except Exception:
+            logging.exception(f"Error while drawing {path}")
+        finally:
+            with self.__condition:
+                self.__processes.pop(path, None)
+                self.__superseded.discard(path)
+                self.__running.discard(path)
+                self.__condition.notify()
+
+    @staticmethod
+    def __kill(process: multiprocessing.Process):
+        """Kill a draw and the graphviz process group it leads."""
+        if process.pid == None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGTERM)
+                return
+        except OSError:
+            # the child has not become a group leader yet
+            pass
+        process.terminate()
+
+
+def _draw_process(render: Callable[[str, str, Any], None], path: str, reason: str, prepared: Any):
+    """Run a draw in a child process, leading a process group so graphviz is killed with it."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    try:
+        render(path, reason, prepared)
+    except Exception:
+        logging.exception(f"Error while drawing {path}")
+        raise SystemExit(1)
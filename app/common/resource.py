@@ -1,29 +1,46 @@
 """Base diagram resource."""
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional, Pattern, Tuple
 import re
 
 from app.common.component import Component
 
 
+# attributes kept for every type, they identify the resource and the tags are shown on the design
+COMMON_ATTRIBUTES = ("id", "name", "resource_group_name", "tags")
+
+# characters on each line of a label before it is wrapped
+LABEL_WIDTH = 25
+
+# wrapped types and metadata kept, they repeat across nodes where names do not
+LABEL_CACHE_SIZE = 4096
+
+
 class Resource(ABC):
     """Base resource component."""
+    label_width = LABEL_WIDTH
+
+    @staticmethod
+    def set_label_width(width: Optional[int] = None):
+        """Set the characters on each line of a label, for every diagram drawn after."""
+        width = LABEL_WIDTH if width == None else int(width)  # type: ignore
+        if (width < 1):
+            raise ValueError(f"Label width must be at least 1, not {width}")
+        Resource.label_width = width
+
     @staticmethod
     def get_name(component: Component, metadata: str) -> str:
-        max_length = 25
-        expression = "(.{" + str(max_length) + "})"
-        
-        component_name = component.name if len(component.name) <= max_length else re.sub(
-            expression, "\\1\n", component.name, 0, re.DOTALL)
+        width = Resource.label_width
+        component_name = wrap_label(component.name, width)
         
         if (component.type == "draw_custom"):
             return component_name
         
-        component_type = component.type if len(component.type) <= max_length else re.sub(
-            expression, "\\1\n", component.type, 0, re.DOTALL)
+        component_type = wrap_label_cached(component.type, width)
         if metadata != "":
-            metadata = metadata if len(metadata) <= max_length else re.sub(
-                expression, "\\1\n", metadata, 0, re.DOTALL)
+            metadata = wrap_label_cached(metadata, width)
         return f'{component_type}\n({component_name})\n{metadata}'
 
     @staticmethod
@@ -32,6 +49,14 @@ class Resource(ABC):
         """Get the identifier for this type in TF."""
         pass
 
+    @staticmethod
+    def attributes() -> Optional[Tuple[str, ...]]:
+        """Get the attributes of this type read when drawing it, others are dropped when the state is read.
+
+        Types that do not declare them keep every attribute.
+        """
+        return None
+
     @staticmethod
     @abstractmethod
     def get_metadata(component: Component) -> str:
@@ -43,3 +68,20 @@ class Resource(ABC):
     def get_node(component: Component, **attrs: dict):
         """Get the underlying diagrams type."""
         pass
+
+
+def wrap_label(text: str, width: int) -> str:
+    """Break text onto a new line after every width characters."""
+    if (len(text) <= width):
+        return text
+    return __expression(width).sub("\\1\n", text)
+
+
+# the same text and width always wraps the same, so this is shared by every diagram drawn in the process
+wrap_label_cached = lru_cache(maxsize=LABEL_CACHE_SIZE)(wrap_label)
+
+
+@lru_cache(maxsize=None)
+def __expression(width: int) -> Pattern:
+    """Get the compiled expression matching width characters."""
+    return re.compile("(.{" + str(width) + "})", re.DOTALL)
@@ -0,0 +1,177 @@
+"""Streaming reader for terraform state files."""
+from typing import IO, Callable, Collection, Dict, Iterator, List, Optional
+import re
+import time
+import click
+import ijson
+
+from app.common.component import Component
+from app.common.component_filter import ComponentFilter
+
+UNPARENTED = "Unparented"
+
+RESOURCE = "resources.item"
+INSTANCE = "resources.item.instances.item"
+ATTRIBUTES = INSTANCE + ".attributes"
+
+# keys of an instance kept when attributes are projected, the rest (private, sensitive_attributes, ...) are never read
+INSTANCE_KEYS = frozenset(["attributes"])
+
+# and when the dependencies between resources are read
+DEPENDENCY_KEYS = INSTANCE_KEYS | frozenset(["dependencies"])
+
+# instance keys of a module, e.g. ["a"] or [0], dependencies are recorded on the module without them
+MODULE_KEYS = re.compile(r'\[[^\]]*\]')
+
+
+def read_components(state_file: IO, supported_nodes: Collection[str], timings: Optional[Dict[str, float]] = None,
+                    projection: Optional[Callable[[str], Optional[Collection[str]]]] = None,
+                    component_filter: Optional[ComponentFilter] = None, dependencies: bool = False) -> Iterator[Component]:
+    """Walk resources[*].instances[*] one at a time and yield a Component for each.
+
+    When timings is given the wall and cpu time spent building components is added to it. When projection
+    is given it gets the attributes to keep for a type, the others are skipped as they are parsed rather than
+    built into each component, None keeps them all. When component_filter is given, blocks of a type it does not
+    allow are skipped without reading their instances and other instances it does not allow are never made
+    into components. When dependencies is set each component gets the address of its resource and the
+    addresses it depends on.
+    """
+    resource: dict = {}
+    pending: List[dict] = []
+    builder = None
+    kept: Optional[Collection[str]] = None
+    skip = False
+    depth = 0
+    instance_keys = DEPENDENCY_KEYS if dependencies else INSTANCE_KEYS
+
+    to_component = __component(component_filter, dependencies)
+    if (not timings is None):
+        to_component = __timed(to_component, timings)
+
+    for prefix, event, value in ijson.parse(state_file, use_float=True):
+        if skip:
+            # drop the value of a key that is not kept, however deeply nested
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            skip = depth > 0
+            continue
+
+        if builder is not None:
+            if event == "map_key" and kept is not None and (
+                    (prefix == INSTANCE and not value in instance_keys) or (prefix == ATTRIBUTES and not value in kept)):
+                skip = True
+                continue
+            builder.event(event, value)
+            if prefix == INSTANCE and event == "end_map":
+                if "type" in resource and not dependencies:
+                    component = to_component(resource, builder.value)
+                    if component is not None:
+                        yield component
+                else:
+                    # instances came before the type, or the module of the address may still be to come, hold them until the resource ends
+                    pending.append(builder.value)
+                builder = None
+            continue
+
+        if prefix == RESOURCE:
+            if event == "start_map":
+                resource = {}
+                pending = []
+                kept = None
+            elif event == "end_map":
+                if not resource.get("supported", False):
+                    click.echo(f"Resource type {resource.get('type')} is not supported.")
+                    continue
+                if not resource["included"]:
+                    click.echo(f"Excluding resources of type {resource['type']}")
+                    continue
+                for attributes in pending:
+                    component = to_component(resource, __project(attributes, kept, instance_keys))
+                    if component is not None:
+                        yield component
+        elif prefix in ("resources.item.type", "resources.item.name", "resources.item.mode", "resources.item.module"):
+            resource[prefix.split(".")[-1]] = value
+            if prefix == "resources.item.type":
+                resource["supported"] = value in supported_nodes
+                resource["included"] = resource["supported"] and (component_filter is None or component_filter.allows_type(value))
+                if (resource["included"] and not projection is None):
+                    kept = projection(value)
+        elif prefix == INSTANCE and event == "start_map":
+            if "type" in resource and not resource["included"]:
+                continue
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+
+
+def __project(instance: dict, kept: Optional[Collection[str]], instance_keys: Collection[str]) -> dict:
+    """Drop what is not kept from an instance read before its type was known."""
+    if (kept is None):
+        return instance
+    attributes = instance.get("attributes", {})
+    projected = {k: v for k, v in instance.items() if k in instance_keys}
+    projected["attributes"] = {k: v for k, v in attributes.items() if k in kept}
+    return projected
+
+
+def __timed(to_component: Callable[[dict, dict], Optional[Component]], timings: Dict[str, float]):
+    """Wrap to_component to add the time spent in it to timings."""
+    def timed(resource: dict, instance: dict) -> Optional[Component]:
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            return to_component(resource, instance)
+        finally:
+            timings["wall"] = timings.get("wall", 0.0) + time.perf_counter() - wall
+            timings["cpu"] = timings.get("cpu", 0.0) + time.thread_time() - cpu
+    return timed
+
+
+def __component(component_filter: Optional[ComponentFilter], dependencies: bool):
+    """Get the function building a component from a resource header and one of its instances, None when filtered out."""
+    build = __to_component if not dependencies else __with_dependencies
+    if (component_filter is None or not component_filter.by_instance):
+        return build
+
+    def to_component(resource: dict, instance: dict) -> Optional[Component]:
+        attributes = instance.get("attributes", {})
+        name = attributes.get("name", resource.get("name"))
+        resource_group_name = attributes.get("resource_group_name", UNPARENTED)
+        if (not component_filter.allows(name, resource["type"], resource_group_name, attributes.get("tags"))):
+            click.echo(f"Excluding resource {name}-{resource['type']}")
+            return None
+        return build(resource, instance)
+    return to_component
+
+
+def __with_dependencies(resource: dict, instance: dict) -> Component:
+    """Build a component with the address of its resource and those it depends on."""
+    component = __to_component(resource, instance)
+    component.address = address(resource.get("module"), resource.get("mode", "managed"), resource["type"], resource.get("name"))
+    component.module = resource.get("module")
+    component.dependencies = instance.get("dependencies") or None
+    return component
+
+
+def address(module: Optional[str], mode: str, type: str, name: str) -> str:
+    """Get the address of a resource as terraform writes it in dependencies, e.g. module.app.azurerm_key_vault.vault."""
+    resource_address = f"{type}.{name}" if mode != "data" else f"data.{type}.{name}"
+    return resource_address if module == None else f"{MODULE_KEYS.sub('', module)}.{resource_address}"
+
+
+def __to_component(resource: dict, instance: dict) -> Component:
+    """Build a component from a resource header and one of its instances."""
+    attributes = instance.get("attributes", {})
+
+    resource_group_name = UNPARENTED
+    if ("resource_group_name" in attributes):
+        resource_group_name = attributes["resource_group_name"]
+
+    resource_name = resource.get("name")
+    if ("name" in attributes):
+        resource_name = attributes["name"]
+
+    mode = resource.get("mode", "manual")
+
+    return Component(resource_name, resource["type"], mode, resource_group_name, attributes)
@@ -0,0 +1 @@
+"""Benchmarks for drawing large designs."""
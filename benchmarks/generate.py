@@ -0,0 +1,272 @@
+"""Generate synthetic tfstate files with a realistic mix of azure resources."""
+from typing import Dict, List, Optional
+import json
+import random
+import click
+
+SUBSCRIPTION = "00000000-0000-0000-0000-000000000000"
+PROVIDER = "provider[\"registry.terraform.io/hashicorp/azurerm\"]"
+TAGS = {"Application": "Benchmark", "Environment": "Dev", "Owner": "Platform Team"}
+
+
+class StateBuilder:
+    """Collect resources into tfstate resource blocks, one block per resource with an instance per count index."""
+
+    def __init__(self, rand: random.Random):
+        """Ctor for state builder."""
+        self.rand = rand
+        self.resources: List[dict] = []
+        self.instances = 0
+        self.module: Optional[str] = None
+
+    def add(self, type: str, name: str, attributes: List[dict]):
+        """Add a resource block with an instance for each set of attributes."""
+        instances = []
+        for index, attrs in enumerate(attributes):
+            instance = {"schema_version": 0, "attributes": attrs, "sensitive_attributes": [], "dependencies": []}
+            if (len(attributes) > 1):
+                instance["index_key"] = index
+            instances.append(instance)
+
+        resource = {"mode": "managed", "type": type, "name": name, "provider": PROVIDER, "instances": instances}
+        if (not self.module == None):
+            resource["module"] = self.module
+        self.resources.append(resource)
+        self.instances += len(instances)
+
+    def count(self, low: int, high: int) -> int:
+        """Get a random count for a resource block."""
+        return self.rand.randint(low, high)
+
+
+def generate_state(instances: int, seed: int = 0) -> dict:
+    """Generate a state with at least the given number of resource instances."""
+    builder = StateBuilder(random.Random(seed))
+    blocks = list(BLOCKS.items())
+    weights = [weight for _, (weight, _) in blocks]
+
+    group = 0
+    while (builder.instances < instances):
+        resource_group = f"rg-bench-{group:04d}"
+        __resource_group(builder, resource_group)
+
+        # each resource group gets a handful of workloads, weighted towards the common ones
+        for _ in range(builder.count(2, 6)):
+            if (builder.instances >= instances):
+                break
+            name, (_, block) = builder.rand.choices(blocks, weights)[0]
+            name = f"{name}{builder.count(0, 10 ** 6):06d}"
+            # workloads are modules, as they would be in a real landing zone
+            builder.module = f"module.{name}"
+            block(builder, resource_group, name)
+        builder.module = None
+        group += 1
+
+    return {
+        "version": 4,
+        "terraform_version": "1.3.0",
+        "serial": 1,
+        "lineage": f"benchmark-{instances}-{seed}",
+        "outputs": {},
+        "resources": builder.resources
+    }
+
+
+def write_state(path: str, instances: int, seed: int = 0):
+    """Write a generated state to a file."""
+    with open(path, "w") as f:
+        json.dump(generate_state(instances, seed), f)
+
+
+def __id(resource_group: str, provider: str, name: str) -> str:
+    """Get an azure resource id."""
+    return f"/subscriptions/{SUBSCRIPTION}/resourceGroups/{resource_group}/providers/{provider}/{name}"
+
+
+def __base(resource_group: str, provider: str, name: str) -> dict:
+    """Get the attributes every azure resource has."""
+    return {
+        "id": __id(resource_group, provider, name),
+        "name": name,
+        "resource_group_name": resource_group,
+        "location": "westeurope",
+        "tags": TAGS
+    }
+
+
+def __resource_group(builder: StateBuilder, resource_group: str):
+    """Resource group holding the workloads."""
+    builder.add("azurerm_resource_group", resource_group.replace("-", "_"), [{
+        "id": f"/subscriptions/{SUBSCRIPTION}/resourceGroups/{resource_group}",
+        "name": resource_group,
+        "location": "westeurope",
+        "tags": TAGS
+    }])
+
+
+def __apps(builder: StateBuilder, resource_group: str, name: str):
+    """Service plan with function apps, web apps and their slots."""
+    plan = __base(resource_group, "Microsoft.Web/serverfarms", f"asp-{name}")
+    plan.update({"os_type": "Windows", "sku_name": builder.rand.choice(["EP1", "P1v2", "S1"])})
+    builder.add("azurerm_service_plan", "plan", [plan])
+
+    functions = []
+    for i in range(builder.count(1, 4)):
+        function = __base(resource_group, "Microsoft.Web/sites", f"func-{name}-{i}")
+        function.update({"app_service_plan_id": plan["id"], "os_type": "", "version": "~4"})
+        functions.append(function)
+    builder.add("azurerm_function_app", "function", functions)
+
+    slots = []
+    for function in functions:
+        slot = __base(resource_group, "Microsoft.Web/sites/slots", f"staging-{function['name']}")
+        slot.update({"function_app_name": function["name"]})
+        slots.append(slot)
+    builder.add("azurerm_function_app_slot", "function_slot", slots)
+
+    web_apps = []
+    for i in range(builder.count(0, 2)):
+        web_app = __base(resource_group, "Microsoft.Web/sites", f"app-{name}-{i}")
+        web_app.update({"service_plan_id": plan["id"]})
+        web_apps.append(web_app)
+    if (len(web_apps) > 0):
+        builder.add("azurerm_windows_web_app", "web_app", web_apps)
+        slots = []
+        for web_app in web_apps:
+            slot = __base(resource_group, "Microsoft.Web/sites/slots", f"staging-{web_app['name']}")
+            slot.update({"app_service_id": web_app["id"]})
+            slots.append(slot)
+        builder.add("azurerm_windows_web_app_slot", "web_app_slot", slots)
+
+
+def __messaging(builder: StateBuilder, resource_group: str, name: str):
+    """Service bus namespace with queues, topics and subscriptions."""
+    namespace = __base(resource_group, "Microsoft.ServiceBus/namespaces", f"sb-{name}")
+    namespace.update({"sku": builder.rand.choice(["Standard", "Premium"])})
+    builder.add("azurerm_servicebus_namespace", "namespace", [namespace])
+
+    queues = []
+    for i in range(builder.count(0, 6)):
+        queue = __base(resource_group, f"Microsoft.ServiceBus/namespaces/{namespace['name']}/queues", f"queue-{i}")
+        queue.update({"namespace_id": namespace["id"], "max_message_size_in_kilobytes": 256,
+                      "max_size_in_megabytes": 1024, "requires_session": False})
+        queues.append(queue)
+    if (len(queues) > 0):
+        builder.add("azurerm_servicebus_queue", "queue", queues)
+
+    topics = []
+    for i in range(builder.count(1, 5)):
+        topic = __base(resource_group, f"Microsoft.ServiceBus/namespaces/{namespace['name']}/topics", f"topic-{name}-{i}")
+        topic.update({"namespace_id": namespace["id"], "max_message_size_in_kilobytes": 256, "max_size_in_megabytes": 1024})
+        topics.append(topic)
+    builder.add("azurerm_servicebus_topic", "topic", topics)
+
+    subscriptions = []
+    for topic in topics:
+        for i in range(builder.count(1, 4)):
+            subscription = __base(resource_group, f"Microsoft.ServiceBus/namespaces/{namespace['name']}/topics/{topic['name']}/subscriptions", f"sub-{i}")
+            subscription.update({"topic_id": topic["id"], "max_delivery_count": 10, "requires_session": False})
+            subscriptions.append(subscription)
+    builder.add("azurerm_servicebus_subscription", "subscription", subscriptions)
+
+
+def __cosmos(builder: StateBuilder, resource_group: str, name: str):
+    """Cosmos account with databases and containers."""
+    account = __base(resource_group, "Microsoft.DocumentDB/databaseAccounts", f"cosmos-{name}")
+    account.update({"offer_type": "Standard", "kind": "GlobalDocumentDB"})
+    builder.add("azurerm_cosmosdb_account", "account", [account])
+
+    databases = []
+    containers = []
+    for i in range(builder.count(1, 3)):
+        database = {"id": f"{account['id']}/sqlDatabases/db-{i}", "name": f"db-{name}-{i}",
+                    "resource_group_name": resource_group, "account_name": account["name"], "throughput": 400}
+        databases.append(database)
+        for j in range(builder.count(1, 6)):
+            containers.append({"id": f"{database['id']}/containers/c-{j}", "name": f"container-{j}",
+                               "resource_group_name": resource_group, "account_name": account["name"],
+                               "database_name": database["name"], "partition_key_path": "/id"})
+    builder.add("azurerm_cosmosdb_sql_database", "database", databases)
+    builder.add("azurerm_cosmosdb_sql_container", "container", containers)
+
+
+def __storage(builder: StateBuilder, resource_group: str, name: str):
+    """Storage account with blob containers."""
+    account = __base(resource_group, "Microsoft.Storage/storageAccounts", f"st{name}")
+    account.update({"access_tier": "Hot", "account_kind": "StorageV2", "account_replication_type": "LRS", "account_tier": "Standard"})
+    builder.add("azurerm_storage_account", "account", [account])
+
+    containers = []
+    for i in range(builder.count(1, 8)):
+        containers.append({"id": f"https://{account['name']}.blob.core.windows.net/container-{i}", "name": f"container-{i}",
+                           "storage_account_name": account["name"], "container_access_type": "private"})
+    builder.add("azurerm_storage_container", "container", containers)
+
+
+def __sql(builder: StateBuilder, resource_group: str, name: str):
+    """SQL server with databases."""
+    server = __base(resource_group, "Microsoft.Sql/servers", f"sql-{name}")
+    server.update({"public_network_access_enabled": False, "version": "12.0"})
+    builder.add("azurerm_mssql_server", "server", [server])
+
+    databases = []
+    for i in range(builder.count(1, 4)):
+        database = __base(resource_group, f"Microsoft.Sql/servers/{server['name']}/databases", f"sqldb-{name}-{i}")
+        database.update({"server_id": server["id"], "sku_name": "S0", "max_size_gb": 250})
+        databases.append(database)
+    builder.add("azurerm_mssql_database", "database", databases)
+
+
+def __monitoring(builder: StateBuilder, resource_group: str, name: str):
+    """Log analytics workspace, application insights and a key vault."""
+    workspace = __base(resource_group, "Microsoft.OperationalInsights/workspaces", f"log-{name}")
+    workspace.update({"sku": "PerGB2018", "retention_in_days": 30})
+    builder.add("azurerm_log_analytics_workspace", "workspace", [workspace])
+
+    insights = __base(resource_group, "Microsoft.Insights/components", f"appi-{name}")
+    insights.update({"retention_in_days": 90, "workspace_id": workspace["id"]})
+    builder.add("azurerm_application_insights", "insights", [insights])
+
+    vault = __base(resource_group, "Microsoft.KeyVault/vaults", f"kv-{name}")
+    vault.update({"sku_name": "standard"})
+    builder.add("azurerm_key_vault", "vault", [vault])
+
+
+def __api_management(builder: StateBuilder, resource_group: str, name: str):
+    """API management with its apis."""
+    apim = __base(resource_group, "Microsoft.ApiManagement/service", f"apim-{name}")
+    apim.update({"sku_name": "Developer_1"})
+    builder.add("azurerm_api_management", "apim", [apim])
+
+    apis = []
+    for i in range(builder.count(1, 8)):
+        api = __base(resource_group, f"Microsoft.ApiManagement/service/{apim['name']}/apis", f"api-{i}")
+        api.update({"api_management_name": apim["name"], "display_name": f"API {i}", "revision": "1"})
+        apis.append(api)
+    builder.add("azurerm_api_management_api", "api", apis)
+
+
+# name prefix: (relative weight, block)
+BLOCKS: Dict[str, tuple] = {
+    "apps": (5, __apps),
+    "bus": (3, __messaging),
+    "cosmos": (2, __cosmos),
+    "st": (3, __storage),
+    "sql": (1, __sql),
+    "mon": (2, __monitoring),
+    "apim": (1, __api_management),
+}
+
+
+@click.command()
+@click.option('--instances', type=int, default=1000, help='Resource instances to generate.')
+@click.option('--seed', type=int, default=0, help='Random seed, the same seed always gives the same state.')
+@click.option('--output', required=True, help='Path of the tfstate file to write.')
+def main(instances: int, seed: int, output: str):
+    """Generate a synthetic tfstate file."""
+    write_state(output, instances, seed)
+    click.secho(f"Wrote {instances} instances to {output}.", fg='green')
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,144 @@
+"""Time each phase of drawing synthetic states of increasing size."""
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import click
+import ijson
+
+from benchmarks.generate import write_state
+
+PHASES = ["parse", "components", "nest", "nodes", "render"]
+
+# phases quicker than this are too noisy to call a regression
+MIN_SECONDS = 0.05
+
+
+def run_size(state_path: str, output_dir: str, render: bool) -> Dict[str, float]:
+    """Time each phase of drawing one state.
+
+    components is the time to build components on top of parsing, render only
+    writes the dot source unless render is set, as graphviz is slow on large states.
+    """
+    from app.azure import azure
+    from app.common.profiler import Profiler
+    from app.common.render import LaidOutDiagram, TimedDiagram
+    from app.common.state import read_components
+
+    timings = {phase: 0.0 for phase in PHASES}
+
+    start = time.perf_counter()
+    with open(state_path, 'rb') as f:
+        for _ in ijson.parse(f, use_float=True):
+            pass
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(state_path, 'rb') as f:
+        components = list(read_components(f, azure.supported_nodes(), None, azure.projection))
+    timings["components"] = max(0.0, time.perf_counter() - start - timings["parse"])
+
+    profiler = Profiler()
+    renders = {x: x.__dict__["render"] for x in (TimedDiagram, LaidOutDiagram)}
+
+    def save_source(self):
+        with self.profiler.phase("graphviz_render"):
+            self.dot.save()
+
+    if (not render):
+        for diagram in renders:
+            diagram.render = save_source  # type: ignore
+    try:
+        azure.draw("Benchmark", os.path.join(output_dir, "benchmark"), components, [], profiler)
+    finally:
+        for diagram, timed_render in renders.items():
+            diagram.render = timed_render  # type: ignore
+
+    timings["nest"] = profiler.get("nesting")["wall"]
+    timings["nodes"] = profiler.get("node_construction")["wall"]
+    timings["render"] = sum(profiler.get(x)["wall"] for x in ("graphviz_render", "graphviz_layout", "image_write"))
+
+    return timings
+
+
+def run(sizes: List[int], seed: int, repeat: int, render: bool, states_dir: str) -> Dict[str, Dict[str, float]]:
+    """Time every size, keeping the quickest of each phase over the repeats."""
+    results = {}
+    os.makedirs(states_dir, exist_ok=True)
+
+    for size in sizes:
+        state_path = os.path.join(states_dir, f"bench-{size}-{seed}.tfstate")
+        if (not os.path.exists(state_path)):
+            click.secho(f"Generating {size} instances to {state_path}...", fg='yellow')
+            write_state(state_path, size, seed)
+
+        best: Optional[Dict[str, float]] = None
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as output_dir:
+                timings = run_size(state_path, output_dir, render)
+            if (best == None):
+                best = timings
+            else:
+                best = {phase: min(best[phase], timings[phase]) for phase in PHASES}
+
+        results[str(size)] = best
+        __print_row(size, best)  # type: ignore
+
+    return results
+
+
+def regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """List the phases that got slower than the baseline by more than the tolerance."""
+    found = []
+    for size, timings in results.items():
+        if (not size in baseline):
+            continue
+        for phase in PHASES:
+            before = baseline[size].get(phase, 0.0)
+            after = timings[phase]
+            if (after >= MIN_SECONDS and after > before * (1 + tolerance)):
+                found.append(f"{size} {phase}: {before:.3f}s -> {after:.3f}s")
+    return found
+
+
+def __print_row(size: int, timings: Dict[str, float]):
+    """Print the timings for a size."""
+    columns = "".join(f"{timings[phase]:>12.3f}" for phase in PHASES)
+    click.echo(f"{size:>10}{columns}{sum(timings.values()):>12.3f}")
+
+
+@click.command()
+@click.option('--sizes', default="1000,10000,100000", help='Comma separated instance counts to benchmark.')
+@click.option('--seed', type=int, default=0, help='Random seed for the generated states.')
+@click.option('--repeat', type=int, default=3, help='Runs per size, the quickest of each phase is kept.')
+@click.option('--render', is_flag=True, default=False, help='Render with graphviz rather than only writing the dot source.')
+@click.option('--states-dir', default=os.path.join(tempfile.gettempdir(), "drawtf-bench"), help='Where generated states are kept between runs.')
+@click.option('--output', help='Write the results to a json file.')
+@click.option('--baseline', help='Results json from an earlier run, exit non-zero if a phase got slower.')
+@click.option('--tolerance', type=float, default=0.25, help='Fraction a phase may slow down by before it counts as a regression.')
+def main(sizes: str, seed: int, repeat: int, render: bool, states_dir: str, output: str, baseline: str, tolerance: float):
+    """Benchmark drawing synthetic states."""
+    logging.getLogger().setLevel(logging.ERROR)
+
+    click.echo(f"{'instances':>10}" + "".join(f"{phase:>12}" for phase in PHASES) + f"{'total':>12}")
+    results = run([int(x) for x in sizes.split(",")], seed, repeat, render, states_dir)
+
+    if (not output == None):
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if (not baseline == None):
+        with open(baseline) as f:
+            found = regressions(results, json.load(f), tolerance)
+        for regression in found:
+            click.secho(f"Regression {regression}", fg='red')
+        if (len(found) > 0):
+            sys.exit(1)
+        click.secho("No regressions.", fg='green')
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -1,10 +1,11 @@
 import sys
+import os
 import time
+import logging
 import click
-from watchdog.observers import Observer
-from watchdog.events import PatternMatchingEventHandler
 
-from app.common.drawing import commonDraw
+from app.common.drawing import commonDraw, load_config, state_references
+from app.common.profiler import PROFILE_SUFFIX
 from dotenv import load_dotenv
 
 @click.group()
@@ -19,28 +20,95 @@ def main():
 @click.option('--output-path', help='Output path if to debug generated json populated.')
 @click.option('--json-config-path', help='Config file path if populated.')
 @click.option('--verbose', is_flag=True, default=False, help='Add verbose logs.')
-def draw(name: str, state: str, platform: str, output_path: str, json_config_path: str, verbose: bool):
+@click.option('--no-cache', is_flag=True, default=False, help='Draw even if nothing has changed since the last draw.')
+@click.option('--profile', is_flag=True, default=False, help='Write the time spent in each phase to a json report next to the output.')
+@click.option('--format', help="Comma separated output formats from 'png', 'jpg', 'svg', 'pdf' and 'dot', defaults to 'png'.")
+@click.option('--layout', type=click.Choice(['fixed', 'adaptive']), help="'adaptive' picks cheaper layout settings for larger designs, defaults to 'fixed'.")
+@click.option('--layout-budget', type=float, help='Seconds the layout may take before it is killed and retried with cheaper settings.')
+@click.option('--split', is_flag=True, default=False, help='Draw each resource group as its own diagram, with an overview of the groups.')
+@click.option('--include', multiple=True, help='Only draw resources with a matching key, repeatable.')
+@click.option('--exclude', multiple=True, help='Skip resources with a matching key, repeatable.')
+@click.option('--include-type', multiple=True, help='Only draw resources of a matching type, repeatable.')
+@click.option('--exclude-type', multiple=True, help='Skip resources of a matching type, repeatable.')
+@click.option('--include-rg', multiple=True, help='Only draw resources in a matching resource group, repeatable.')
+@click.option('--exclude-rg', multiple=True, help='Skip resources in a matching resource group, repeatable.')
+@click.option('--include-tag', multiple=True, help="Only draw resources with a matching 'Name=Value' or 'Name' tag, repeatable.")
+@click.option('--exclude-tag', multiple=True, help="Skip resources with a matching 'Name=Value' or 'Name' tag, repeatable.")
+@click.option('--label-width', type=int, help='Characters on each line of a label before it wraps, defaults to 25.')
+@click.option('--infer-links', is_flag=True, default=False, help='Link resources to the resources their attributes reference by id.')
+@click.option('--dependencies', is_flag=True, default=False, help='Link resources to those they depend on in the state, without links implied by others.')
+def draw(name: str, state: str, platform: str, output_path: str, json_config_path: str, verbose: bool, no_cache: bool, profile: bool, format: str,
+         layout: str, layout_budget: float, split: bool, include: tuple, exclude: tuple, include_type: tuple, exclude_type: tuple,
+         include_rg: tuple, exclude_rg: tuple, include_tag: tuple, exclude_tag: tuple, label_width: int,
+         infer_links: bool, dependencies: bool):
     """Draw a single design from config and settings."""
     load_dotenv()
-    return commonDraw(name, state, platform, output_path, json_config_path, verbose)
+    filters = {
+        "include_keys": include,
+        "exclude_keys": exclude,
+        "include_types": include_type,
+        "exclude_types": exclude_type,
+        "include_resource_groups": include_rg,
+        "exclude_resource_groups": exclude_rg,
+        "include_tags": include_tag,
+        "exclude_tags": exclude_tag
+    }
+    return commonDraw(name, state, platform, output_path, json_config_path, verbose, not no_cache, profile, format, layout, layout_budget, split,
+                      {k: list(v) for k, v in filters.items() if len(v) > 0}, label_width, infer_links, dependencies)
 
-last_trigger_time = time.time()
+@click.command(name='draw-all')
+@click.option('--configs', required=True, help='Directory or glob of config files to draw.')
+@click.option('--workers', type=int, default=None, help='Worker processes to draw with, defaults to the cpu count.')
+@click.option('--verbose', is_flag=True, default=False, help='Add verbose logs.')
+@click.option('--no-cache', is_flag=True, default=False, help='Draw even if nothing has changed since the last draw.')
+def draw_all(configs: str, workers: int, verbose: bool, no_cache: bool):
+    """Draw every design found in a directory or glob in parallel."""
+    load_dotenv()
+    from app.common.batch import find_configs, draw_all as batch_draw_all
+
+    paths = find_configs(configs)
+    if len(paths) == 0:
+        click.secho(f"No config files found for {configs}.", fg='red')
+        sys.exit(1)
+
+    click.secho(f"Drawing {len(paths)} designs...", fg='yellow')
+    start = time.perf_counter()
+    results = batch_draw_all(paths, workers, verbose, not no_cache)
+
+    click.secho("Summary:", fg='yellow')
+    for result in results:
+        status = "OK" if result.ok else "FAILED"
+        message = f"{status:<7}{result.seconds:>8.2f}s  {result.path}"
+        if not result.ok:
+            message = f"{message}  {result.error}"
+        click.secho(message, fg='green' if result.ok else 'red')
+
+    failed = len([x for x in results if not x.ok])
+    click.secho(f"{len(results) - failed} drawn, {failed} failed in {time.perf_counter() - start:.2f}s.", fg='red' if failed > 0 else 'green')
+    sys.exit(1 if failed > 0 else 0)
 
 @click.command()
 @click.option('--directory', help='Directory to watch for changes in.')
-def watch(directory: str):
+@click.option('--workers', type=int, default=2, help='Designs to draw at the same time.')
+@click.option('--delay', type=float, default=1.0, help='Seconds a file must be quiet for before it is drawn.')
+def watch(directory: str, workers: int, delay: float):
     """Watch a directory for changes to draw."""
     load_dotenv()
+    from watchdog.observers import Observer
+    from watchdog.events import PatternMatchingEventHandler
+    from app.common.render_queue import RenderQueue
     click.secho("Starting watch for *.json files...", fg='yellow')
     
+    render_queue = RenderQueue(__render, delay, workers, __prepare)
+    
     patterns = ["*.json"]
-    ignore_patterns = None
+    ignore_patterns = [f"*{PROFILE_SUFFIX}"]
     ignore_directories = True
     case_sensitive = False
     event_handler = PatternMatchingEventHandler(patterns, ignore_patterns, ignore_directories, case_sensitive)
-    event_handler.on_created = __on_created
-    event_handler.on_modified = __on_modified
-    event_handler.on_moved = __on_moved
+    event_handler.on_created = lambda event: __queue(render_queue, event.src_path, "New file")
+    event_handler.on_modified = lambda event: __queue(render_queue, event.src_path, "Modified file")
+    event_handler.on_moved = lambda event: __queue(render_queue, event.dest_path, "Moved file")
     
     observer = Observer()
     observer.schedule(event_handler, directory, recursive=True)
@@ -49,42 +117,44 @@ def watch(directory: str):
     click.secho(f"Watching in {directory}...", fg='yellow')
     
     try:
-        while observer.isAlive():
+        while observer.is_alive():
             observer.join(1)
     except KeyboardInterrupt:
         observer.stop()
         observer.join()
+        render_queue.stop()
         click.secho("Exiting watch...", fg='yellow')
 
-def __on_created(event):
-    global last_trigger_time
-    current_time = time.time()
-    if event.src_path.find('~') == -1 and (current_time - last_trigger_time) > 1:
-        last_trigger_time = current_time
-        click.secho(f"New file {event.src_path}, drawing...", fg='yellow')
-        commonDraw(None, None, None, None, event.src_path, None)
-        click.secho(f"{event.src_path} done.", fg='green')
+def __queue(render_queue, path: str, reason: str):
+    if path.find('~') == -1:
+        render_queue.submit(path, reason)
 
-def __on_modified(event):
-    global last_trigger_time
-    current_time = time.time()
-    if event.src_path.find('~') == -1 and (current_time - last_trigger_time) > 1:
-        last_trigger_time = current_time
-        click.secho(f"Modified file {event.src_path}, drawing...", fg='yellow')
-        commonDraw(None, None, None, None, event.src_path, None)
-        click.secho(f"{event.src_path} done.", fg='green')
-    
-def __on_moved(event):
-    global last_trigger_time
-    current_time = time.time()
-    if event.src_path.find('~') == -1 and (current_time - last_trigger_time) > 1:
-        last_trigger_time = current_time
-        click.secho(f"Moved file {event.dest_path}, drawing...", fg='yellow')
-        commonDraw(None, None, None, None, event.dest_path, None)
-        click.secho(f"{event.dest_path} done.", fg='green')
+def __prepare(path: str):
+    """Warm the client pool in the watching process so each draw skips the azure auth round trips."""
+    from app.common.client_pool import POOL
+    try:
+        config_data = load_config(path)
+        for state, storage_config in state_references(None, config_data):
+            if (not storage_config == None and not os.path.exists(state)):
+                POOL.get_connection(storage_config)
+    except Exception as e:
+        logging.debug(f"Unable to warm remote state clients for {path}: {e}")
+    return POOL.export()
+
+def __render(path: str, reason: str, connections):
+    from app.common.client_pool import POOL
+    POOL.restore(connections)
+    click.secho(f"{reason} {path}, drawing...", fg='yellow')
+    code = commonDraw(None, None, None, None, path, None)
+    if (code != 0):
+        click.secho(f"{path} failed.", fg='red')
+        # the queue records the draw as failed from the exit code of its process
+        sys.exit(code)
+    click.secho(f"{path} done.", fg='green')
 
 
 main.add_command(draw)
+main.add_command(draw_all)
 main.add_command(watch)
 
 if __name__ == "__main__":
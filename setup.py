@@ -2,11 +2,15 @@
 
 """The setup script."""
 
+import re
 from setuptools import setup, find_packages
 
 with open('README.md') as readme_file:
     readme = readme_file.read()
 
+with open("app/__init__.py", "r", encoding="utf-8") as fh:
+    version = re.search(r'__version__ = "(.*)"', fh.read()).group(1)  # type: ignore
+
 with open("requirements.txt", "r", encoding="utf-8") as fh:
     requirements = fh.read()
 
@@ -34,10 +38,10 @@ setup(
     include_package_data=True,
     keywords='drawtf,terraform,ci/cd,design,architecture,diagrams,graphviz',
     name='drawtf',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     py_modules=['drawtf', 'app'],
     test_suite='tests',
     url='https://github.com/Aggreko/DrawTF',
-    version='0.11.0',
+    version=version,
     zip_safe=False,
 )
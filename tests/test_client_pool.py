@@ -0,0 +1,61 @@
+"""Tests for sharing account connections between concurrent fetches."""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from app.common.client_pool import ClientPool
+
+KEY_DELAY = 0.3
+
+
+class FakeStorageClient:
+    """Management client whose list_keys takes a while, as the real call does."""
+
+    def __init__(self):
+        """Ctor for fake storage client."""
+        self.storage_accounts = self
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def list_keys(self, resource_group: str, account: str):
+        with self.lock:
+            self.calls.append(account)
+        time.sleep(KEY_DELAY)
+        key = type("Key", (), {"key_name": "key1", "value": f"{account}-key"})
+        return type("Keys", (), {"keys": [key]})
+
+
+def __pool(client: FakeStorageClient) -> ClientPool:
+    """Get a pool fetching keys from the fake client."""
+    pool = ClientPool(60)
+    setattr(pool, "_ClientPool__get_storage_client", lambda subscription_id: client)
+    return pool
+
+
+def __storage(account: str) -> dict:
+    """Get the storage config of an account."""
+    return {"subscription-id": "0", "resource-group": "rg", "account": account, "container": "tfstate"}
+
+
+def test_accounts_fetched_at_once():
+    client = FakeStorageClient()
+    pool = __pool(client)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        connections = list(executor.map(lambda x: pool.get_connection(__storage(x)), ["a", "b", "c", "d"]))
+
+    assert time.perf_counter() - start < KEY_DELAY * 2
+    assert [x.split(";")[2] for x in connections] == ["AccountKey=a-key", "AccountKey=b-key", "AccountKey=c-key", "AccountKey=d-key"]
+
+
+def test_account_fetched_once():
+    client = FakeStorageClient()
+    pool = __pool(client)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        connections = set(executor.map(lambda x: pool.get_connection(__storage("a")), range(4)))
+
+    assert len(connections) == 1
+    assert client.calls == ["a"]
+    assert pool.get_connection({"connection-string": "UseDevelopmentStorage=true"}) == "UseDevelopmentStorage=true"
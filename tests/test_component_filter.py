@@ -0,0 +1,96 @@
+"""Tests for filtering resources by key, type, resource group and tags."""
+import json
+import re
+
+import pytest
+
+from app.common.component_filter import ComponentFilter, Matcher
+from app.common.drawing import commonDraw
+
+
+def test_exact_glob_and_regex():
+    matcher = Matcher(["kv-app-azurerm_key_vault", "rg-app-*", "re:azurerm_servicebus_(queue|topic)"])
+
+    assert matcher.matches("kv-app-azurerm_key_vault")
+    assert matcher.matches("rg-app-dev")
+    assert matcher.matches("azurerm_servicebus_queue")
+    assert not matcher.matches("kv-app-azurerm_key_vault-2")
+    assert not matcher.matches("azurerm_servicebus_namespace")
+    assert not matcher.matches(None)
+
+
+def test_glob_characters_match_their_own_text():
+    matcher = Matcher(["App [legacy]-draw_custom", "what?"])
+
+    assert matcher.matches("App [legacy]-draw_custom")
+    assert matcher.matches("App l-draw_custom")
+    assert matcher.matches("what?")
+    assert matcher.matches("whats")
+
+
+def test_ignore_case():
+    matcher = Matcher(["RG-App", "rg-*-DEV"], True)
+
+    assert matcher.matches("rg-app")
+    assert matcher.matches("RG-APP-DEV")
+    assert not Matcher(["RG-App"]).matches("rg-app")
+
+
+def test_types():
+    component_filter = ComponentFilter(include_types=["azurerm_key_vault*"], exclude_types=["azurerm_key_vault_secret"])
+
+    assert component_filter.allows_type("azurerm_key_vault")
+    assert component_filter.allows_type("azurerm_key_vault_key")
+    assert not component_filter.allows_type("azurerm_key_vault_secret")
+    assert not component_filter.allows_type("azurerm_storage_account")
+    assert not component_filter.by_instance
+
+
+def test_keys():
+    component_filter = ComponentFilter(include_keys=["kv-*"], exclude_keys=["kv-old-azurerm_key_vault"])
+
+    assert component_filter.allows("kv-app", "azurerm_key_vault", "rg", None)
+    assert not component_filter.allows("kv-old", "azurerm_key_vault", "rg", None)
+    assert not component_filter.allows("st-app", "azurerm_storage_account", "rg", None)
+
+
+def test_resource_groups():
+    component_filter = ComponentFilter(include_resource_groups=["rg-app-*"], exclude_resource_groups=["RG-APP-OLD"])
+
+    assert component_filter.allows("kv", "azurerm_key_vault", "RG-App-Dev", None)
+    assert not component_filter.allows("kv", "azurerm_key_vault", "rg-app-old", None)
+    assert not component_filter.allows("kv", "azurerm_key_vault", "rg-data", None)
+
+    # a resource group matches on its own name
+    assert component_filter.allows("rg-app-dev", "azurerm_resource_group", None, None)
+    assert not component_filter.allows("rg-app-old", "azurerm_resource_group", None, None)
+
+
+def test_tags():
+    component_filter = ComponentFilter(include_tags=["Environment=Dev*"], exclude_tags=["Retired"])
+
+    assert component_filter.allows("kv", "azurerm_key_vault", "rg", {"Environment": "Development"})
+    assert not component_filter.allows("kv", "azurerm_key_vault", "rg", {"Environment": "Production"})
+    assert not component_filter.allows("kv", "azurerm_key_vault", "rg", {"Environment": "Dev", "Retired": "2020"})
+    assert not component_filter.allows("kv", "azurerm_key_vault", "rg", None)
+
+
+def test_config_and_cli_combined():
+    component_filter = ComponentFilter.from_config({"excludes": ["kv-a-azurerm_key_vault"]}, exclude_keys=["kv-b-azurerm_key_vault"])
+
+    assert not component_filter.allows("kv-a", "azurerm_key_vault", "rg", None)
+    assert not component_filter.allows("kv-b", "azurerm_key_vault", "rg", None)
+    assert component_filter.allows("kv-c", "azurerm_key_vault", "rg", None)
+
+
+def test_invalid_regex():
+    with pytest.raises(re.error):
+        ComponentFilter(include_types=["re:azurerm_(key"])
+
+
+def test_invalid_regex_in_config(tmp_path, capsys):
+    config_path = tmp_path / "design.json"
+    config_path.write_text(json.dumps({"state": "missing.tfstate", "includeTypes": ["re:azurerm_(key"]}))
+
+    assert commonDraw(None, None, None, None, str(config_path), False) == 1
+    assert "Invalid filter pattern" in capsys.readouterr().out
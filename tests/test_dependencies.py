@@ -0,0 +1,94 @@
+"""Tests for links drawn from the dependencies terraform records."""
+import logging
+from typing import Optional
+
+from app.common.component import Component
+from app.common.dependencies import dependency_links, transitive_reduction
+
+
+def __component(name: str, address: str, dependencies: list, components: list = [], module: Optional[str] = None) -> Component:
+    """Get a key vault component with its terraform address, dependencies and keyed module path."""
+    component = Component(name, "azurerm_key_vault", "managed", "rg", {}, components)
+    component.address = address
+    component.module = module
+    component.dependencies = dependencies
+    return component
+
+
+def test_reduction_of_chain():
+    graph = {"app": {"plan", "rg"}, "plan": {"rg"}, "rg": set()}
+
+    assert transitive_reduction(graph) == {"app": ["plan"], "plan": ["rg"], "rg": []}
+
+
+def test_reduction_keeps_every_reachable_node():
+    graph = {"a": {"b", "c", "d"}, "b": {"d"}, "c": {"d"}, "d": set(), "e": {"a", "d"}}
+
+    assert transitive_reduction(graph) == {"a": ["b", "c"], "b": ["d"], "c": ["d"], "d": [], "e": ["a"]}
+
+
+def test_reduction_of_cycle(caplog):
+    graph = {"a": {"b", "c"}, "b": {"a", "c"}, "c": set(), "d": {"a", "c"}}
+
+    with caplog.at_level(logging.WARNING):
+        reduced = transitive_reduction(graph)
+
+    assert reduced == {"a": ["b", "c"], "b": ["a", "c"], "c": [], "d": ["a", "c"]}
+    # c is behind the cycle so nothing is known to reach it, d keeps its link to c even though a reaches it
+    assert "a, b, c are in or behind a cycle" in caplog.text
+
+
+def test_dependency_links():
+    rg = __component("rg", "azurerm_resource_group.rg", [])
+    plan = __component("plan", "azurerm_service_plan.plan", ["azurerm_resource_group.rg"])
+    secret = __component("secret", "azurerm_key_vault_secret.secret", ["azurerm_key_vault.kv", "azurerm_resource_group.rg"])
+    vault = __component("kv", "azurerm_key_vault.kv", ["azurerm_resource_group.rg"], [secret])
+    apps = [__component(x, "azurerm_linux_web_app.app", ["azurerm_service_plan.plan", "azurerm_resource_group.rg",
+                                                         "azurerm_key_vault.kv", "random_string.unknown"]) for x in ("a", "b")]
+
+    links = dependency_links([rg, plan, vault] + apps)
+
+    # the secret's links are shown by nesting or implied by the key vault
+    assert sorted((x["from"], x["to"]) for x in links) == [
+        ("a-azurerm_key_vault", "kv-azurerm_key_vault"),
+        ("a-azurerm_key_vault", "plan-azurerm_key_vault"),
+        ("b-azurerm_key_vault", "kv-azurerm_key_vault"),
+        ("b-azurerm_key_vault", "plan-azurerm_key_vault"),
+        ("kv-azurerm_key_vault", "rg-azurerm_key_vault"),
+        ("plan-azurerm_key_vault", "rg-azurerm_key_vault")
+    ]
+
+
+def test_dependency_links_within_module_instances():
+    components = []
+    for key in ("a", "b", "c"):
+        module = f'module.app["{key}"]'
+        vault = __component(f"kv-{key}", "module.app.azurerm_key_vault.kv", [], module=module)
+        app = __component(f"app-{key}", "module.app.azurerm_linux_web_app.app", ["module.app.azurerm_key_vault.kv"], module=module)
+        # a nested module depends on the instance of the module it is called from
+        db = __component(f"db-{key}", "module.app.module.db.azurerm_mssql_database.db", ["module.app.azurerm_key_vault.kv"],
+                         module=f"{module}.module.db")
+        components += [vault, app, db]
+
+    assert sorted((x["from"], x["to"]) for x in dependency_links(components)) == [
+        ("app-a-azurerm_key_vault", "kv-a-azurerm_key_vault"),
+        ("app-b-azurerm_key_vault", "kv-b-azurerm_key_vault"),
+        ("app-c-azurerm_key_vault", "kv-c-azurerm_key_vault"),
+        ("db-a-azurerm_key_vault", "kv-a-azurerm_key_vault"),
+        ("db-b-azurerm_key_vault", "kv-b-azurerm_key_vault"),
+        ("db-c-azurerm_key_vault", "kv-c-azurerm_key_vault")
+    ]
+
+
+def test_dependency_links_to_every_instance_outside_the_module_instance():
+    # the vault of module.app["b"] is not drawn, and the shared plan is in one module called once per region
+    vault = __component("kv-a", "module.app.azurerm_key_vault.kv", [], module='module.app["a"]')
+    plans = [__component(f"plan-{x}", "module.plan.azurerm_service_plan.plan", [], module=f'module.plan["{x}"]') for x in ("east", "west")]
+    app = __component("app-b", "module.app.azurerm_linux_web_app.app",
+                      ["module.app.azurerm_key_vault.kv", "module.plan.azurerm_service_plan.plan"], module='module.app["b"]')
+
+    assert sorted((x["from"], x["to"]) for x in dependency_links([vault, app] + plans)) == [
+        ("app-b-azurerm_key_vault", "kv-a-azurerm_key_vault"),
+        ("app-b-azurerm_key_vault", "plan-east-azurerm_key_vault"),
+        ("app-b-azurerm_key_vault", "plan-west-azurerm_key_vault")
+    ]
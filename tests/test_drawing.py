@@ -0,0 +1,53 @@
+"""Tests for reading the states of a config and merging their components."""
+import json
+
+from app.common.component import Component
+from app.common.drawing import commonDraw, merge_states, state_references
+
+VAULT_ID = "/subscriptions/0/resourceGroups/rg/providers/Microsoft.KeyVault/vaults/kv"
+STORAGE = {"account": "account", "container": "tfstate"}
+
+
+def __component(name: str, mode: str, attributes: dict) -> Component:
+    """Get a key vault component."""
+    return Component(name, "azurerm_key_vault", mode, "rg", attributes)
+
+
+def test_merge_prefers_managed():
+    data = __component("kv", "data", {"id": VAULT_ID})
+    managed = __component("kv", "managed", {"id": VAULT_ID.upper()})
+    other = __component("other", "managed", {"id": VAULT_ID + "2"})
+
+    assert merge_states([[data, other], [managed]]) == [managed, other]
+
+
+def test_merge_by_key_without_id():
+    first = __component("kv", "managed", {})
+    second = __component("kv", "data", {})
+
+    assert merge_states([[first], [second]]) == [first]
+
+
+def test_merge_keeps_repeats_within_a_state():
+    first = __component("kv", "data", {"id": VAULT_ID})
+    second = __component("kv", "data", {"id": VAULT_ID})
+    third = __component("kv", "data", {"id": VAULT_ID})
+
+    assert merge_states([[first, second], [third]]) == [first, second]
+
+
+def test_state_references():
+    other = {"account": "other", "container": "tfstate"}
+    config = {"state": ["a.tfstate", {"path": "b.tfstate"}, {"path": "c.tfstate", "storage-azure": other}], "storage-azure": STORAGE}
+
+    assert state_references(None, config) == [("a.tfstate", STORAGE), ("b.tfstate", STORAGE), ("c.tfstate", other)]
+    assert state_references("cli.tfstate", config) == [("cli.tfstate", STORAGE)]
+    assert state_references(None, {}) == []
+
+
+def test_state_entry_without_path(tmp_path, capsys):
+    config_path = tmp_path / "design.json"
+    config_path.write_text(json.dumps({"state": [{"storage-azure": STORAGE}]}))
+
+    assert commonDraw(None, None, None, None, str(config_path), False) == 1
+    assert "has no path" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+"""Tests for inferring links from resource id references."""
+from app.common.component import Component
+from app.common.inference import LinkInference
+
+PROVIDERS = "/subscriptions/0/resourceGroups/rg/providers"
+VAULT_ID = f"{PROVIDERS}/Microsoft.KeyVault/vaults/kv"
+SUBNET_ID = f"{PROVIDERS}/Microsoft.Network/virtualNetworks/vnet/subnets/subnet"
+
+
+def __component(name: str, type: str, attributes: dict, components: list = []) -> Component:
+    """Get a component in the rg resource group."""
+    return Component(name, type, "managed", "rg", attributes, components)
+
+
+def test_top_level_references():
+    vault = __component("kv", "azurerm_key_vault", {"id": VAULT_ID})
+    subnet = __component("subnet", "azurerm_subnet", {"id": SUBNET_ID})
+    app = __component("app", "azurerm_linux_web_app", {
+        "key_vault_id": f"{VAULT_ID}/secrets/password",
+        "subnet_ids": [SUBNET_ID.replace("Microsoft.Network", "microsoft.network")],
+        "site_config": {"subnet_id": SUBNET_ID},
+        "name_id": "not a resource id"
+    })
+
+    links = LinkInference().infer([vault, subnet, app])
+
+    assert [(x["from"], x["to"], x["label"]) for x in links] == [
+        ("app-azurerm_linux_web_app", "kv-azurerm_key_vault", "key_vault_id"),
+        ("app-azurerm_linux_web_app", "subnet-azurerm_subnet", "subnet_ids")
+    ]
+
+
+def test_nested_and_excluded_references_skipped():
+    secret = __component("secret", "azurerm_key_vault_secret", {"key_vault_id": VAULT_ID})
+    vault = __component("kv", "azurerm_key_vault", {"id": VAULT_ID}, [secret])
+    app = __component("app", "azurerm_linux_web_app", {"key_vault_id": VAULT_ID})
+
+    inference = LinkInference.from_config({"excludeTypes": ["azurerm_linux_web_app"]})
+
+    assert inference.infer([vault, app]) == []
@@ -0,0 +1,84 @@
+"""Tests for expanding links whose ends select several resources."""
+from typing import Optional
+
+from app.common.component import Component
+from app.common.links import LinkIndex, expand_links
+
+
+def __component(name: str, type: str, resource_group: str, tags: Optional[dict] = None,
+                components: Optional[list] = None) -> Component:
+    """Get a managed component."""
+    return Component(name, type, "managed", resource_group, {"tags": tags} if tags != None else {}, components)
+
+
+def __components() -> list:
+    """Get two resource groups holding function apps and a key vault."""
+    func_a = __component("func-a", "azurerm_function_app", "rg-app-dev", {"Environment": "Dev"})
+    func_b = __component("func-b", "azurerm_function_app", "rg-app-prod", {"Environment": "Prod"})
+    vault = __component("kv-app", "azurerm_key_vault", "rg-app-dev", {"Environment": "Dev"})
+    dev = __component("rg-app-dev", "azurerm_resource_group", "rg-app-dev", None, [func_a, vault])
+    prod = __component("rg-app-prod", "azurerm_resource_group", "rg-app-prod", None, [func_b])
+    return [dev, prod]
+
+
+def test_key_selectors():
+    index = LinkIndex(__components())
+
+    assert index.select("func-*") == ["func-a-azurerm_function_app", "func-b-azurerm_function_app"]
+    assert index.select("re:kv-.*") == ["kv-app-azurerm_key_vault"]
+    assert index.select({"key": ["func-a-azurerm_function_app", "missing"]}) == ["func-a-azurerm_function_app"]
+    assert index.select("kv-app-azurerm_key_vault") == ["kv-app-azurerm_key_vault"]
+
+
+def test_type_selectors():
+    index = LinkIndex(__components())
+
+    assert index.select({"type": "azurerm_key_vault"}) == ["kv-app-azurerm_key_vault"]
+    assert index.select({"type": "re:azurerm_(function_app|key_vault)", "key": "*-a-*"}) == ["func-a-azurerm_function_app"]
+
+
+def test_resource_group_selectors():
+    index = LinkIndex(__components())
+
+    assert index.select({"resourceGroup": "RG-APP-PROD"}) == ["rg-app-prod-azurerm_resource_group", "func-b-azurerm_function_app"]
+    assert index.select({"resourceGroup": "rg-app-*", "type": "azurerm_function_app"}) == [
+        "func-a-azurerm_function_app", "func-b-azurerm_function_app"
+    ]
+
+
+def test_resource_group_matches_its_own_name():
+    dev = __component("rg-app-dev", "azurerm_resource_group", "TFSTATE_RG", None, [])
+    index = LinkIndex([dev])
+
+    assert index.select({"resourceGroup": "rg-app-dev"}) == ["rg-app-dev-azurerm_resource_group"]
+    assert index.select({"resourceGroup": "rg-*"}) == ["rg-app-dev-azurerm_resource_group"]
+
+
+def test_tag_selectors():
+    index = LinkIndex(__components())
+
+    assert index.select({"tag": "Environment=Dev"}) == ["func-a-azurerm_function_app", "kv-app-azurerm_key_vault"]
+    assert index.select({"tag": "Environment=P*"}) == ["func-b-azurerm_function_app"]
+    assert index.select({"tag": "Environment"}) == ["func-a-azurerm_function_app", "kv-app-azurerm_key_vault", "func-b-azurerm_function_app"]
+
+
+def test_cluster_selectors():
+    index = LinkIndex(__components())
+
+    assert index.select("cluster-rg-app-*") == ["cluster-rg-app-dev-azurerm_resource_group", "cluster-rg-app-prod-azurerm_resource_group"]
+    assert index.select({"key": "cluster-rg-app-dev-azurerm_resource_group"}) == ["cluster-rg-app-dev-azurerm_resource_group"]
+    assert index.select({"key": "*-azurerm_resource_group"}) == ["rg-app-dev-azurerm_resource_group", "rg-app-prod-azurerm_resource_group"]
+    assert index.select({"key": "cluster-*"}) == ["cluster-rg-app-dev-azurerm_resource_group", "cluster-rg-app-prod-azurerm_resource_group"]
+
+
+def test_expand_links():
+    links = [
+        {"from": {"type": "azurerm_function_app", "resourceGroup": "rg-app-*"}, "to": "kv-*", "label": "Secrets"},
+        {"from": "func-a-azurerm_function_app", "to": "kv-app-azurerm_key_vault", "label": "Secrets"},
+        {"from": "missing-*", "to": "kv-*"}
+    ]
+
+    assert [(x["from"], x["to"]) for x in expand_links(links, __components())] == [  # type: ignore
+        ("func-a-azurerm_function_app", "kv-app-azurerm_key_vault"),
+        ("func-b-azurerm_function_app", "kv-app-azurerm_key_vault")
+    ]
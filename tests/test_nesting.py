@@ -0,0 +1,94 @@
+"""Tests for nesting azure resources under their parents and resource groups."""
+import os
+
+from app.azure import azure
+from app.azure.azure_resource_factory import AzureResourceFactory
+from app.common.component import Component
+from app.common.component_index import ComponentIndex
+from app.common.state import read_components
+
+NESTING_STATE = os.path.join(os.path.dirname(__file__), "..", "test", "nesting.tfstate")
+
+# drawn by drawtf before resources were nested through the component index
+EXPECTED = [
+    ("rg-a-azurerm_resource_group", [
+        ("apim-azurerm_api_management", [
+            ("api-azurerm_api_management_api", []),
+            ("logger-azurerm_api_management_logger", [])]),
+        ("ai-azurerm_application_insights", []),
+        ("plan-azurerm_service_plan", [
+            ("fn-azurerm_linux_function_app", []),
+            ("web-azurerm_windows_web_app", [
+                ("staging-azurerm_windows_web_app_slot", [])])]),
+        ("sb-azurerm_servicebus_namespace", [
+            ("q-azurerm_servicebus_queue", []),
+            ("q2-azurerm_servicebus_queue", []),
+            ("t-azurerm_servicebus_topic", [
+                ("s-azurerm_servicebus_subscription", [])])]),
+        ("st-azurerm_storage_account", [
+            ("blob-azurerm_storage_container", [])]),
+        ("dbw-azurerm_databricks_workspace", [
+            ("cluster-databricks_cluster", []),
+            ("mount-databricks_azure_adls_gen2_mount", [])]),
+        ("kv-azurerm_key_vault", []),
+        ("kv-data-azurerm_key_vault", [])]),
+    ("rg-b-azurerm_resource_group", [
+        ("legacy-plan-azurerm_app_service_plan", [
+            ("fa-azurerm_function_app", [
+                ("fa-slot-azurerm_function_app_slot", [])]),
+            ("as-azurerm_app_service", [
+                ("as-slot-azurerm_app_service_slot", [])])]),
+        ("cosmos-azurerm_cosmosdb_account", [
+            ("db-azurerm_cosmosdb_sql_database", [
+                ("c-azurerm_cosmosdb_sql_container", [])]),
+            ("implicit-db-azurerm_cosmosdb_sql_database", [
+                ("c2-azurerm_cosmosdb_sql_container", [])])]),
+        ("sql-azurerm_mssql_server", [
+            ("sqldb-azurerm_mssql_database", [])]),
+        ("kv-dup-azurerm_key_vault", []),
+        ("sn-azurerm_subnet", [])]),
+    ("rg-c-azurerm_resource_group", [
+        ("missing-sb-azurerm_servicebus_namespace", [
+            ("q3-azurerm_servicebus_queue", [])])]),
+    ("Unparented-azurerm_resource_group", [
+        ("missing-st-azurerm_storage_account", [
+            ("orphan-azurerm_storage_container", [])]),
+        ("gone-azurerm_mssql_server", [
+            ("lost-azurerm_mssql_database", [])]),
+        ("kv-unparented-azurerm_key_vault", [])])
+]
+
+
+def __tree(components) -> list:
+    """Get the keys of nested components."""
+    return [(x.key, __tree(x.components)) for x in components]
+
+
+def __nest(projection=None) -> list:
+    """Nest every component of the nesting state."""
+    with open(NESTING_STATE, "rb") as f:
+        components = list(read_components(f, azure.supported_nodes(), projection=projection))
+    return AzureResourceFactory.nest_resources(components)
+
+
+def test_nesting_matches_baseline():
+    assert __tree(__nest()) == EXPECTED
+
+
+def test_nesting_with_projection():
+    nested = __nest(azure.projection)
+
+    assert __tree(nested) == EXPECTED
+    # parents made for orphaned children are read from the state
+    assert [(x.key, x.mode) for x in nested[2:]] == [("rg-c-azurerm_resource_group", "data"),
+                                                     ("Unparented-azurerm_resource_group", "data")]
+
+
+def test_index_by_type_and_id():
+    vault = Component("kv", "azurerm_key_vault", "managed", "rg", {"id": "/id"})
+    server = Component("sql", "azurerm_mssql_server", "managed", "rg", {"id": "/id"})
+    index = ComponentIndex([vault, server])
+
+    assert index.get_by_id("azurerm_mssql_server", "/id") is server
+    assert index.get_by_id("azurerm_key_vault", "/id") is vault
+    assert index.get_by_id("azurerm_storage_account", "/id") == None
@@ -0,0 +1,135 @@
+"""Tests for fetching remote states against a stand-in for blob storage."""
+import os
+import stat
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+from app.common import remote_state
+
+STORAGE = {"account": "account", "container": "tfstate"}
+
+
+class FakeDownloader:
+    """Download of a blob, failing partway through when asked to."""
+
+    def __init__(self, content: bytes, etag: str, fail: bool):
+        """Ctor for fake downloader."""
+        self.content = content
+        self.properties = type("Properties", (), {"etag": etag})
+        self.fail = fail
+
+    def readinto(self, stream):
+        stream.write(self.content[:len(self.content) // 2])
+        if self.fail:
+            raise ConnectionError("connection reset")
+        stream.write(self.content[len(self.content) // 2:])
+
+
+class FakeStorage:
+    """Blobs with etags, answering conditional requests as azure storage does."""
+
+    def __init__(self):
+        """Ctor for fake storage."""
+        self.blobs = {}
+        self.downloads = 0
+        self.fail = False
+
+    def put(self, blob: str, content: bytes):
+        etag = f'"{len(self.blobs) + self.downloads}-{hash(content)}"'
+        self.blobs[blob] = (content, etag)
+
+    def get_blob_client(self, storage_config: dict, blob: str):
+        return FakeBlobClient(self, blob)
+
+
+class FakeBlobClient:
+    """Client for one blob of the fake storage."""
+
+    def __init__(self, storage: FakeStorage, blob: str):
+        """Ctor for fake blob client."""
+        self.storage = storage
+        self.blob = blob
+
+    def download_blob(self, etag=None, match_condition=None, **kwargs):
+        if not self.blob in self.storage.blobs:
+            raise ResourceNotFoundError("The specified blob does not exist.")
+        content, current = self.storage.blobs[self.blob]
+        if match_condition == MatchConditions.IfModified and etag == current:
+            error = HttpResponseError("Not modified")
+            error.status_code = 304
+            raise error
+        self.storage.downloads += 1
+        return FakeDownloader(content, current, self.storage.fail)
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    fake = FakeStorage()
+    monkeypatch.setattr(remote_state, "POOL", fake)
+    monkeypatch.setenv("DRAWTF_CACHE_DIR", str(tmp_path))
+    return fake
+
+
+def __fetch(blob: str, **storage_config) -> bytes:
+    """Fetch a blob, reading the state it opens."""
+    with remote_state.fetch_state({**STORAGE, **storage_config}, blob) as f:
+        return f.read()
+
+
+def __cached_files(tmp_path) -> list:
+    """Get the files in the state cache."""
+    return sorted(os.listdir(tmp_path / "states"))
+
+
+def test_unchanged_state_is_not_downloaded_again(storage, tmp_path):
+    storage.put("app.tfstate", b'{"resources": []}')
+
+    assert __fetch("app.tfstate") == b'{"resources": []}'
+    assert __fetch("app.tfstate") == b'{"resources": []}'
+    assert storage.downloads == 1
+    assert len(__cached_files(tmp_path)) == 2
+
+
+def test_changed_state_is_downloaded(storage):
+    storage.put("app.tfstate", b'{"resources": []}')
+    __fetch("app.tfstate")
+    storage.put("app.tfstate", b'{"resources": [{}]}')
+
+    assert __fetch("app.tfstate") == b'{"resources": [{}]}'
+    assert storage.downloads == 2
+
+
+def test_missing_state(storage):
+    assert remote_state.fetch_state(STORAGE, "missing.tfstate") == None
+
+
+def test_uncached_state_is_not_kept(storage, tmp_path):
+    storage.put("app.tfstate", b'{"resources": []}')
+
+    assert __fetch("app.tfstate", cache=False) == b'{"resources": []}'
+    assert __fetch("app.tfstate", cache=False) == b'{"resources": []}'
+    assert storage.downloads == 2
+    assert not os.path.exists(tmp_path / "states")
+
+
+def test_cache_is_private(storage, tmp_path):
+    storage.put("app.tfstate", b'{"resources": []}')
+    os.makedirs(tmp_path / "states", mode=0o755)
+    os.chmod(tmp_path / "states", 0o755)
+
+    __fetch("app.tfstate")
+
+    assert stat.S_IMODE(os.stat(tmp_path / "states").st_mode) == 0o700
+    for name in __cached_files(tmp_path):
+        assert stat.S_IMODE(os.stat(tmp_path / "states" / name).st_mode) == 0o600
+
+
+def test_partial_download_is_removed(storage, tmp_path):
+    storage.put("app.tfstate", b'{"resources": [], "secret": "value"}')
+    storage.fail = True
+
+    with pytest.raises(ConnectionError):
+        __fetch("app.tfstate")
+    assert __cached_files(tmp_path) == []
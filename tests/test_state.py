@@ -0,0 +1,142 @@
+"""Tests for the streaming tfstate reader."""
+import io
+import json
+import os
+
+from app.azure import azure
+from app.common.component_filter import ComponentFilter
+from app.common.state import UNPARENTED, address, read_components
+
+APP_STATE = os.path.join(os.path.dirname(__file__), "..", "test", "app.tfstate")
+
+
+def __state(*resources: dict) -> io.BytesIO:
+    """Get a state file holding the resources."""
+    return io.BytesIO(json.dumps({"version": 4, "resources": list(resources)}).encode("utf-8"))
+
+
+def __read(state: io.BytesIO, **kwargs) -> list:
+    """Read every component from a state with the azure types."""
+    return list(read_components(state, azure.supported_nodes(), **kwargs))
+
+
+def test_instances_before_type():
+    state = __state({
+        "instances": [{"attributes": {"name": "kv", "resource_group_name": "rg", "sku_name": "standard", "extra": 1}}],
+        "name": "vault",
+        "type": "azurerm_key_vault",
+        "mode": "managed"
+    })
+
+    components = __read(state, projection=azure.projection)
+
+    assert [x.key for x in components] == ["kv-azurerm_key_vault"]
+    assert components[0].mode == "managed"
+    assert components[0].resource_group == "rg"
+    assert components[0].attributes == {"name": "kv", "resource_group_name": "rg", "sku_name": "standard"}
+
+
+def test_nested_attributes_skipped():
+    state = __state({
+        "mode": "managed",
+        "type": "azurerm_key_vault",
+        "name": "vault",
+        "instances": [{
+            "schema_version": 2,
+            "attributes": {
+                "access_policy": [{"object_id": "a", "permissions": [["get", {"deep": [1, 2]}], []]}],
+                "name": "kv",
+                "network_acls": {"bypass": "None", "rules": {"ip": ["1.2.3.4"]}},
+                "sku_name": "premium",
+                "tags": {"Environment": "Dev"}
+            },
+            "sensitive_attributes": [[{"type": "get_attr", "value": "secret"}]],
+            "private": "abc"
+        }]
+    })
+
+    components = __read(state, projection=azure.projection)
+
+    assert len(components) == 1
+    assert components[0].attributes == {"name": "kv", "sku_name": "premium", "tags": {"Environment": "Dev"}}
+    assert components[0].resource_group == UNPARENTED
+
+
+def test_unsupported_blocks_skipped():
+    state = __state(
+        {"mode": "managed", "type": "azurerm_role_assignment", "name": "role",
+         "instances": [{"attributes": {"name": "role", "nested": {"name": "not a resource"}}}]},
+        {"instances": [{"attributes": {"name": "before type"}}], "mode": "managed", "type": "random_string", "name": "x"},
+        {"mode": "managed", "type": "azurerm_key_vault", "name": "vault", "instances": [{"attributes": {"name": "kv"}}]}
+    )
+
+    assert [x.key for x in __read(state)] == ["kv-azurerm_key_vault"]
+
+
+def test_mode_and_module():
+    state = __state(
+        {"module": "module.app", "mode": "data", "type": "azurerm_resource_group", "name": "rg",
+         "instances": [{"attributes": {"name": "rg-app"}, "dependencies": []}]},
+        {"instances": [{"attributes": {"name": "kv"}, "dependencies": ["module.app.azurerm_resource_group.rg"]}],
+         "mode": "managed", "type": "azurerm_key_vault", "name": "vault", "module": "module.app"},
+        {"type": "azurerm_key_vault", "name": "other", "instances": [{"attributes": {}}]}
+    )
+
+    components = __read(state, projection=azure.projection, dependencies=True)
+
+    assert [(x.name, x.mode, x.address) for x in components] == [
+        ("rg-app", "data", "module.app.data.azurerm_resource_group.rg"),
+        ("kv", "managed", "module.app.azurerm_key_vault.vault"),
+        ("other", "manual", "azurerm_key_vault.other")
+    ]
+    assert components[1].dependencies == ["module.app.azurerm_resource_group.rg"]
+    assert components[2].dependencies == None
+
+
+def test_module_instance_keys_stripped():
+    state = __state({"module": 'module.app["a"].module.db[0]', "mode": "managed", "type": "azurerm_key_vault", "name": "vault",
+                     "instances": [{"attributes": {"name": "kv"}, "dependencies": []}]})
+
+    components = __read(state, dependencies=True)
+
+    assert [x.address for x in components] == ["module.app.module.db.azurerm_key_vault.vault"]
+    assert [x.module for x in components] == ['module.app["a"].module.db[0]']
+    assert address('module.app["a"]', "data", "azurerm_key_vault", "vault") == "module.app.data.azurerm_key_vault.vault"
+    assert address(None, "managed", "azurerm_key_vault", "vault") == "azurerm_key_vault.vault"
+
+
+def test_filtered_types_and_instances():
+    state = __state(
+        {"mode": "managed", "type": "azurerm_key_vault", "name": "vault",
+         "instances": [{"attributes": {"name": "kv-a", "resource_group_name": "rg-a"}},
+                       {"attributes": {"name": "kv-b", "resource_group_name": "rg-b"}}]},
+        {"mode": "managed", "type": "azurerm_storage_account", "name": "st",
+         "instances": [{"attributes": {"name": "st", "resource_group_name": "rg-a"}}]}
+    )
+
+    component_filter = ComponentFilter(exclude_types=["azurerm_storage_*"], include_resource_groups=["RG-A"])
+
+    assert [x.key for x in __read(state, component_filter=component_filter)] == ["kv-a-azurerm_key_vault"]
+
+
+def test_matches_json_load():
+    with open(APP_STATE) as f:
+        expected = []
+        for resource in json.load(f)["resources"]:
+            if resource["type"] in azure.supported_nodes():
+                for instance in resource["instances"]:
+                    attributes = instance["attributes"]
+                    expected.append((attributes.get("name", resource["name"]), resource["type"], resource["mode"],
+                                     attributes.get("resource_group_name", UNPARENTED), attributes))
+
+    with open(APP_STATE, "rb") as f:
+        components = __read(f)
+    with open(APP_STATE, "rb") as f:
+        projected = __read(f, projection=azure.projection)
+
+    assert len(expected) > 0
+    assert [(x.name, x.type, x.mode, x.resource_group, x.attributes) for x in components] == expected
+    assert [(x.name, x.type, x.mode, x.resource_group) for x in projected] == [x[:4] for x in expected]
+    for component, (_, _, _, _, attributes) in zip(projected, expected):
+        kept = azure.projection(component.type)
+        assert component.attributes == {k: v for k, v in attributes.items() if k in kept}